@@ -1,10 +1,20 @@
 from django.urls import path
+
+from core.routers import read_only_view
 from . import views
 
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path(
+        'author/',
+        read_only_view(views.AboutAuthorView.as_view()),
+        name='author'
+    ),
+    path(
+        'tech/',
+        read_only_view(views.AboutTechView.as_view()),
+        name='tech'
+    ),
 ]
@@ -0,0 +1,375 @@
+import asyncio
+import copy
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.asgi import build_environ
+from posts import counters, search, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+BATCH = 5000
+WORDS = (
+    'матрица кролик таблетка ложка агент оракул корабль сион пророчество '
+    'избранный код зеркало телефон дверь ключ поезд станция архитектор'
+).split()
+
+
+def _text(rnd, words=12):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+
+def _bulk(model, objects):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BATCH:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def seed(users=500, groups=50, posts=10000, comments=10000, follows=2000,
+         seed=42):
+    """Наполняет базу детерминированными данными и строит производные."""
+    rnd = random.Random(seed)
+    password = make_password('benchmark')
+    _bulk(User, (
+        User(username=f'bench_{i}', password=password)
+        for i in range(users)
+    ))
+    _bulk(Group, (
+        Group(title=f'Группа {i}', slug=f'group-{i}', description=_text(rnd))
+        for i in range(groups)
+    ))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    _bulk(Post, (
+        Post(
+            author_id=rnd.choice(user_ids),
+            group_id=rnd.choice(group_ids) if rnd.random() < 0.7 else None,
+            text=_text(rnd, 40),
+        )
+        for _ in range(posts)
+    ))
+    first_post, last_post = (
+        Post.objects.order_by('pk').first().pk,
+        Post.objects.order_by('pk').last().pk,
+    )
+    _bulk(Comment, (
+        Comment(
+            post_id=rnd.randint(first_post, last_post),
+            author_id=rnd.choice(user_ids),
+            text=_text(rnd),
+        )
+        for _ in range(comments)
+    ))
+    pairs = set()
+    while len(pairs) < min(follows, len(user_ids) * (len(user_ids) - 1)):
+        user_id, author_id = rnd.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    _bulk(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in sorted(pairs)
+    ))
+
+    # bulk_create не шлёт сигналы: производные данные строятся отдельно.
+    for model in (User, Group, Post):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        counters.reconcile(model, 0, (last.first() or 0) + 1)
+    timeline.mark_popular()
+    for follow in Follow.objects.select_related('user', 'author'):
+        timeline.backfill(follow.user, follow.author)
+    search.rebuild()
+
+
+def routes():
+    """Маршруты posts, users и about с аргументами из засеянной базы."""
+    post = Post.objects.order_by('-comment_count', 'pk').first()
+    author = User.objects.order_by('-stats__posts', 'pk').first()
+    group = Group.objects.order_by('-post_count', 'pk').first()
+    reader = User.objects.order_by('-stats__following', 'pk').first()
+    target = User.objects.exclude(pk=reader.pk).order_by('pk').first()
+
+    def follow_target():
+        Follow.objects.get_or_create(user=reader, author=target)
+
+    def unfollow_target():
+        Follow.objects.filter(user=reader, author=target).delete()
+
+    reset_kwargs = {
+        'uidb64': urlsafe_base64_encode(force_bytes(reader.pk)),
+        'token': default_token_generator.make_token(reader),
+    }
+    return reader, [
+        ('posts:index', {}, None),
+        ('posts:search', {}, None),
+        ('posts:group_posts', {}, None),
+        ('posts:group_list', {'slug': group.slug}, None),
+        ('posts:profile', {'username': author.username}, None),
+        ('posts:post_detail', {'post_id': post.pk}, None),
+        ('posts:post_edit', {'post_id': post.pk}, None),
+        ('posts:post_create', {}, None),
+        ('posts:add_comment', {'post_id': post.pk}, None),
+        ('posts:follow_index', {}, None),
+        ('posts:profile_follow', {'username': target.username},
+         unfollow_target),
+        ('posts:profile_unfollow', {'username': target.username},
+         follow_target),
+        ('users:signup', {}, None),
+        ('users:logout', {}, None),
+        ('users:login', {}, None),
+        ('users:password_change', {}, None),
+        ('users:password_change_done', {}, None),
+        ('users:password_reset', {}, None),
+        ('users:password_reset_done', {}, None),
+        ('users:password_reset_confirm', reset_kwargs, None),
+        ('users:password_change_complete', {}, None),
+        ('about:author', {}, None),
+        ('about:tech', {}, None),
+    ]
+
+
+def _percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(repeat=20):
+    """Замеряет каждый маршрут; возвращает словарь для JSON-отчёта."""
+    reader, route_list = routes()
+    client = Client()
+    results = {}
+    cache.clear()
+    for name, kwargs, prepare in route_list:
+        url = reverse(name, kwargs=kwargs)
+        if name == 'posts:search':
+            url += '?q=' + WORDS[0]
+        timings, queries, statuses = [], [], set()
+        for _ in range(repeat):
+            client.force_login(reader)
+            if prepare is not None:
+                prepare()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured))
+            statuses.add(response.status_code)
+        results[name] = {
+            'url': url,
+            'status': sorted(statuses),
+            'first_ms': round(timings[0], 3),
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(_percentile(timings, 0.95), 3),
+            'max_ms': round(max(timings), 3),
+            'queries_first': queries[0],
+            'queries_p50': statistics.median(queries),
+            'queries_max': max(queries),
+        }
+    return results
+
+
+def isolated_caches(location):
+    """CACHES с общим уровнем в `location`, а не в каталоге сайта."""
+    isolated = copy.deepcopy(settings.CACHES)
+    isolated['shared']['LOCATION'] = location
+    return isolated
+
+
+def cache_stats():
+    """Попадания по уровням кэша, если бэкенд их считает."""
+    get_stats = getattr(cache, 'get_stats', None)
+    return get_stats() if get_stats is not None else None
+
+
+def volumes():
+    return {
+        'users': get_user_model().objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def _hammer(operation, deadline, results):
+    # Каждый поток — отдельное соединение, как воркер сервера. После
+    # операции соединение закрывается по тем же правилам, что и в конце
+    # запроса: при CONN_MAX_AGE=0 — всегда.
+    done = locked = 0
+    while time.monotonic() < deadline:
+        try:
+            operation()
+            done += 1
+        except OperationalError:
+            locked += 1
+        finally:
+            connection.close_if_unusable_or_obsolete()
+    connection.close()
+    results.append((done, locked))
+
+
+def concurrency(readers=4, writers=2, seconds=5, seed=42):
+    """Пропускная способность чтения и записи под параллельной нагрузкой.
+
+    Читатели берут первую страницу главной ленты, писатели добавляют
+    комментарии; «database is locked» считается отдельно.
+    """
+    rnd = random.Random(seed)
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    connection.close()
+
+    def read():
+        list(Post.objects.select_related('author', 'group')[:10])
+
+    def write():
+        Comment.objects.create(
+            post_id=rnd.choice(post_ids),
+            author_id=rnd.choice(user_ids),
+            text=_text(rnd),
+        )
+
+    deadline = time.monotonic() + seconds
+    reads, writes = [], []
+    threads = [
+        threading.Thread(target=_hammer, args=(read, deadline, reads))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=_hammer, args=(write, deadline, writes))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'reads_per_s': round(sum(done for done, _ in reads) / seconds, 1),
+        'writes_per_s': round(sum(done for done, _ in writes) / seconds, 1),
+        'locked_reads': sum(locked for _, locked in reads),
+        'locked_writes': sum(locked for _, locked in writes),
+    }
+
+
+def read_urls():
+    """Страницы только для чтения, которые открывают анонимы."""
+    post = Post.objects.order_by('-comment_count', 'pk').first()
+    author = User.objects.order_by('-stats__posts', 'pk').first()
+    group = Group.objects.order_by('-post_count', 'pk').first()
+    return [
+        reverse('posts:index'),
+        reverse('posts:group_list', kwargs={'slug': group.slug}),
+        reverse('posts:profile', kwargs={'username': author.username}),
+        reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        reverse('about:author'),
+    ]
+
+
+def _scope(url):
+    path, _, query = url.partition('?')
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80),
+    }
+
+
+def _call_wsgi(handler, scope):
+    # Синхронный воркер: запрос целиком, от окружения до закрытия ответа.
+    status = []
+    response = handler(
+        build_environ(scope, b''),
+        lambda line, headers, exc_info=None: status.append(line),
+    )
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return int(status[0].split(' ', 1)[0])
+
+
+async def _call_asgi(app, scope):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]['status']
+
+
+async def _drive(call, urls, concurrency, total):
+    timings, errors, issued = [], 0, 0
+
+    async def client():
+        nonlocal errors, issued
+        while issued < total:
+            scope = _scope(urls[issued % len(urls)])
+            issued += 1
+            started = time.perf_counter()
+            if await call(scope) != 200:
+                errors += 1
+            timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests_per_s': round(len(timings) / elapsed, 1),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(_percentile(timings, 0.95), 3),
+        'max_ms': round(max(timings), 3),
+        'errors': errors,
+    }
+
+
+def load(app, urls, wsgi_workers=4, concurrency=200, total=2000):
+    """Одна и та же нагрузка на WSGI- и ASGI-развёртывание.
+
+    WSGI — `wsgi_workers` синхронных воркеров, каждый держит запрос от
+    начала до конца; ASGI — приложение `app` с его пулом потоков.
+    `concurrency` клиентов шлют запросы без пауз, пока не наберётся
+    `total`; задержка включает ожидание свободного воркера.
+    """
+    handler = WSGIHandler()
+    with ThreadPoolExecutor(max_workers=wsgi_workers) as workers:
+        loop = asyncio.new_event_loop()
+
+        def call_wsgi(scope):
+            return loop.run_in_executor(workers, _call_wsgi, handler, scope)
+
+        try:
+            wsgi = loop.run_until_complete(
+                _drive(call_wsgi, urls, concurrency, total)
+            )
+            asgi = loop.run_until_complete(_drive(
+                lambda scope: _call_asgi(app, scope),
+                urls, concurrency, total
+            ))
+        finally:
+            loop.close()
+    return {'wsgi': wsgi, 'asgi': asgi}
@@ -0,0 +1,253 @@
+import itertools
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.utils.functional import cached_property
+
+_MISSING = object()
+
+
+class LocalTier:
+    """Ограниченный LRU процесса с временем жизни записей."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires, raw = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        # Значение хранится сериализованным, как в LocMemCache: изменение
+        # полученного объекта не должно менять закэшированный.
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, raw)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedFileCache(FileBasedCache):
+    """FileBasedCache для общего уровня: атомарные add/incr, редкая чистка.
+
+    add и incr идут под блокировкой файла в каталоге кэша, поэтому
+    одновременные сдвиги версий лент из разных воркеров не теряются.
+    Файлы пересчитываются не при каждой записи, а раз в CULL_EVERY
+    записей процесса: каталог может превысить MAX_ENTRIES на столько
+    записей на воркер. Чистка удаляет случайную долю файлов, включая
+    версии лент — вытесненная версия заводится заново, см. posts.caching.
+    Блокировки надёжны только на локальном диске, поэтому уровень общий
+    для воркеров одной машины, не для нескольких серверов.
+
+    OPTIONS: как у FileBasedCache и CULL_EVERY.
+    """
+
+    lock_name = 'atomic.lock'
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        self._writes = itertools.count()
+
+    @contextmanager
+    def _locked(self):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._locked():
+            return super().incr(key, delta, version)
+
+    def _cull(self):
+        # Полный обход каталога — O(числа записей), поэтому не на каждый set.
+        if next(self._writes) % self._cull_every == 0:
+            super()._cull()
+
+
+class TwoTierCache(BaseCache):
+    """Маленький LRU процесса поверх общего для всех воркеров кэша.
+
+    Записи живут в процессе не дольше LOCAL_TIMEOUT секунд. Инвалидация
+    между процессами держится на версиях: ключи страниц и фрагментов
+    содержат версию ленты или updated_at поста, поэтому устаревшая
+    локальная копия просто перестаёт запрашиваться. Сами версии
+    (SHARED_ONLY_PREFIXES) читаются только из общего кэша.
+
+    OPTIONS: SHARED — алиас общего кэша в CACHES, LOCAL_MAX_ENTRIES,
+    LOCAL_TIMEOUT, SHARED_ONLY_PREFIXES.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = options.get('SHARED', 'shared')
+        self._local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._shared_only = tuple(options.get('SHARED_ONLY_PREFIXES', ()))
+        self.local = LocalTier(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @cached_property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_key(self, key, version):
+        if key.startswith(self._shared_only):
+            return None
+        return self.make_key(key, version)
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self._local_timeout
+        return min(self._local_timeout, timeout)
+
+    def _remember(self, local_key, value, timeout=DEFAULT_TIMEOUT):
+        if local_key is None:
+            return
+        ttl = self._local_ttl(timeout)
+        if ttl > 0:
+            self.local.set(local_key, value, ttl)
+        else:
+            self.local.delete(local_key)
+
+    def _forget(self, key, version):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            self.local.delete(local_key)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        if local_key is not None:
+            value = self.local.get(local_key)
+            if value is not _MISSING:
+                self.hits['local'] += 1
+                return value
+            self.misses['local'] += 1
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.misses['shared'] += 1
+            return default
+        self.hits['shared'] += 1
+        self._remember(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, rest = {}, []
+        for key in keys:
+            local_key = self._local_key(key, version)
+            value = _MISSING
+            if local_key is not None:
+                value = self.local.get(local_key)
+                if value is _MISSING:
+                    self.misses['local'] += 1
+                else:
+                    self.hits['local'] += 1
+            if value is _MISSING:
+                rest.append(key)
+            else:
+                found[key] = value
+        if rest:
+            shared = self.shared.get_many(rest, version=version)
+            self.hits['shared'] += len(shared)
+            self.misses['shared'] += len(rest) - len(shared)
+            for key, value in shared.items():
+                self._remember(self._local_key(key, version), value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._remember(self._local_key(key, version), value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._remember(self._local_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._remember(self._local_key(key, version), value, timeout)
+        else:
+            self._forget(key, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._forget(key, version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def clear(self):
+        # Чистит общий кэш и LRU этого процесса; в других процессах
+        # локальные копии доживают свои LOCAL_TIMEOUT секунд.
+        self.local.clear()
+        self.shared.clear()
+
+    def get_stats(self):
+        """Попадания и промахи по уровням с момента старта процесса."""
+        stats = {}
+        for tier in ('local', 'shared'):
+            hits, misses = self.hits[tier], self.misses[tier]
+            stats[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 3) if hits else 0,
+            }
+        stats['local']['entries'] = len(self.local)
+        return stats
@@ -0,0 +1,139 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from .staticfiles import brotli
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/x-ndjson', 'image/svg+xml',
+)
+# Блоки, где пробелы значимы (pre, textarea) или где перевод строки —
+# часть синтаксиса (// комментарии и автоподстановка ; в script)
+PROTECTED = re.compile(
+    r'(<(pre|textarea|script)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL
+)
+NEWLINE_RUN = re.compile(r'[ \t\r\f\v]*\n\s*')
+COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+
+def minify_html(html):
+    """Убирает отступы и комментарии, не трогая pre, textarea и script.
+
+    Любая серия пробелов с переводом строки сжимается до одного перевода
+    строки: для браузера это тот же пробел, поэтому вёрстка не меняется.
+    Пробелы внутри строки (и в значениях атрибутов) остаются как есть.
+    """
+    parts = PROTECTED.split(html)
+    result = []
+    # split с двумя группами: текст, защищённый блок, имя тега, текст…
+    for index in range(0, len(parts), 3):
+        text = COMMENT.sub('', parts[index])
+        result.append(NEWLINE_RUN.sub('\n', text))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        quality = re.search(r'q=([0-9.]+)', params)
+        if quality and float(quality.group(1)) == 0:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(request):
+    """br или gzip по Accept-Encoding; None — отдавать как есть."""
+    accepted = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    if 'br' in accepted and brotli is not None:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def _compressible(response):
+    return (
+        response.status_code == 200
+        and not response.has_header('Content-Encoding')
+        and 'no-transform' not in response.get('Cache-Control', '')
+        and response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+def _weaken_etag(response):
+    # Сжатое тело уже не байт в байт с исходным: ETag становится слабым.
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+def compress_response(request, response):
+    """Минифицирует HTML и сжимает ответ под клиента.
+
+    Ответ меняется на месте. Короче COMPRESSION_MIN_SIZE не сжимается:
+    заголовки и CPU дороже выигрыша.
+    """
+    if getattr(response, 'compressed', False):
+        # Сжат ещё под cache_page (compress_page), а ETag мог добавить
+        # внешний декоратор вроде condition().
+        _weaken_etag(response)
+        return response
+    if not _compressible(response):
+        return response
+    if response.streaming:
+        # Потоковые выгрузки не буферизуются: только gzip на лету.
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if 'gzip' in accepted:
+            response.streaming_content = compress_sequence(
+                response.streaming_content
+            )
+            response['Content-Encoding'] = 'gzip'
+            response.compressed = True
+            del response['Content-Length']
+            _weaken_etag(response)
+        return response
+    if (
+        response['Content-Type'].startswith('text/html')
+        and not getattr(response, 'minified', False)
+    ):
+        response.content = minify_html(
+            response.content.decode(response.charset)
+        ).encode(response.charset)
+        response['Content-Length'] = len(response.content)
+        response.minified = True
+    if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = choose_encoding(request)
+    if encoding == 'br':
+        compressed = brotli.compress(
+            response.content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    elif encoding == 'gzip':
+        compressed = gzip.compress(
+            response.content, settings.COMPRESSION_GZIP_LEVEL, mtime=0
+        )
+    else:
+        return response
+    if len(compressed) >= len(response.content):
+        return response
+    response.content = compressed
+    response['Content-Length'] = len(compressed)
+    response['Content-Encoding'] = encoding
+    response.compressed = True
+    _weaken_etag(response)
+    return response
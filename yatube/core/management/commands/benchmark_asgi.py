@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+from core.asgi import ASGIHandler
+from .benchmark_sqlite import LOCAL_CACHES
+from .benchmark_views import git_revision
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI (N синхронных воркеров) и ASGI (пул потоков) '
+        'под высокой параллельной нагрузкой на страницы для чтения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--wsgi-workers', type=int, default=4)
+        parser.add_argument('--asgi-threads', type=int, default=32)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None,
+                            help='Файл для JSON-отчёта, иначе stdout')
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='yatube-asgi-')
+        # Файловая база, а не база в памяти: потоки воркеров открывают
+        # собственные соединения, как в настоящем развёртывании.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            workdir, 'bench.sqlite3'
+        )
+        try:
+            with override_settings(CACHES=LOCAL_CACHES):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                benchmark.seed(
+                    users=options['users'], groups=20,
+                    posts=options['posts'], comments=options['posts'],
+                    follows=options['users'] * 5, seed=options['seed'],
+                )
+                urls = benchmark.read_urls()
+                report = {
+                    'revision': git_revision(),
+                    'volumes': benchmark.volumes(),
+                    'urls': urls,
+                    'concurrency': options['concurrency'],
+                    'requests': options['requests'],
+                    'wsgi_workers': options['wsgi_workers'],
+                    'asgi_threads': options['asgi_threads'],
+                }
+                report.update(benchmark.load(
+                    ASGIHandler(options['asgi_threads']), urls,
+                    wsgi_workers=options['wsgi_workers'],
+                    concurrency=options['concurrency'],
+                    total=options['requests'],
+                ))
+        finally:
+            connection.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
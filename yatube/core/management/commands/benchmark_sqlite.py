@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+from .benchmark_views import git_revision
+
+# Кэш на время замера — в памяти процесса: сигналы комментариев
+# не должны трогать общий кэш работающего сайта.
+LOCAL_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения и записи SQLite со '
+        'стандартными настройками и с SQLITE_PRAGMAS + CONN_MAX_AGE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default=None,
+                            help='Файл для JSON-отчёта, иначе stdout')
+
+    def handle(self, *args, **options):
+        modes = {
+            'stock': ({}, 0),
+            'tuned': (
+                settings.SQLITE_PRAGMAS,
+                settings.DATABASES['default']['CONN_MAX_AGE'],
+            ),
+        }
+        workdir = tempfile.mkdtemp(prefix='yatube-sqlite-')
+        template = os.path.join(workdir, 'template.sqlite3')
+        # Засеянный шаблон копируется для каждого режима: WAL запоминается
+        # в файле базы, поэтому режимы не должны делить один файл.
+        connection.settings_dict['TEST']['NAME'] = template
+        report = {
+            'revision': git_revision(),
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'seconds': options['seconds'],
+            'modes': {},
+        }
+        try:
+            with override_settings(SQLITE_PRAGMAS={}, CACHES=LOCAL_CACHES):
+                connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                benchmark.seed(
+                    users=options['users'], groups=10,
+                    posts=options['posts'], comments=options['posts'],
+                    follows=options['users'], seed=options['seed'],
+                )
+                report['volumes'] = benchmark.volumes()
+                connection.close()
+            for mode, (pragmas, max_age) in modes.items():
+                path = os.path.join(workdir, f'{mode}.sqlite3')
+                shutil.copy(template, path)
+                connection.settings_dict['NAME'] = path
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                with override_settings(
+                    SQLITE_PRAGMAS=pragmas, CACHES=LOCAL_CACHES
+                ):
+                    report['modes'][mode] = dict(
+                        benchmark.concurrency(
+                            readers=options['readers'],
+                            writers=options['writers'],
+                            seconds=options['seconds'],
+                            seed=options['seed'],
+                        ),
+                        pragmas=pragmas,
+                        conn_max_age=max_age,
+                    )
+                connection.close()
+        finally:
+            connection.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
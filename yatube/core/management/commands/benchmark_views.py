@@ -0,0 +1,92 @@
+import json
+import platform
+import subprocess
+import tempfile
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from core import benchmark
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Засевает отдельную тестовую базу и замеряет p50/p95 времени '
+        'и число запросов для всех маршрутов posts, users и about'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=None,
+                            help='По умолчанию равно --posts')
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Запросов на маршрут')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не пересоздавать засеянную базу')
+        parser.add_argument('--output', default=None,
+                            help='Файл для JSON-отчёта, иначе stdout')
+
+    def handle(self, *args, **options):
+        # Свой общий кэш: run() очищает его перед замером, а страницы
+        # тестовой базы не должны попасть к работающему сайту.
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(
+                CACHES=benchmark.isolated_caches(location)
+            ):
+                report = self.measure(options)
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def measure(self, options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            if not options['keepdb'] or not benchmark.volumes()['posts']:
+                benchmark.seed(
+                    users=options['users'],
+                    groups=options['groups'],
+                    posts=options['posts'],
+                    comments=(
+                        options['posts'] if options['comments'] is None
+                        else options['comments']
+                    ),
+                    follows=options['follows'],
+                    seed=options['seed'],
+                )
+            report = {
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'volumes': benchmark.volumes(),
+                'repeat': options['repeat'],
+                'routes': benchmark.run(repeat=options['repeat']),
+                'cache': benchmark.cache_stats(),
+            }
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+        return report
@@ -0,0 +1,34 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в файлы реплик '
+        '(settings.DATABASE_REPLICAS) через backup API'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_DB_REPLICAS'
+            )
+        source = sqlite3.connect(connections['default'].settings_dict['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                connections[alias].close()
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME']
+                )
+                try:
+                    # backup() копирует согласованный снимок даже при
+                    # одновременной записи в основную базу.
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: синхронизирована')
+        finally:
+            source.close()
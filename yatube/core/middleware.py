@@ -0,0 +1,175 @@
+import mimetypes
+import os
+import posixpath
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.decorators import decorator_from_middleware
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import routers
+from .compression import accepted_encodings, compress_response
+from .queries import QueryCounter, get_budget, record, route_name
+
+
+class QueryCountMiddleware:
+    """Считает SQL-запросы и их время для каждого маршрута.
+
+    Превышение бюджета вьюхи (`@query_budget` или settings.QUERY_BUDGETS)
+    пишется в лог, а при QUERY_BUDGET_RAISE роняет запрос — так N+1
+    ловится тестами.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        record(route_name(match), counter, request.query_budget)
+        response['Server-Timing'] = (
+            f'sql;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"'
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_budget(
+            route_name(request.resolver_match), view_func
+        )
+
+
+class ReplicaMiddleware:
+    """Держит чтение на основной базе после записи пользователя.
+
+    Запрос, который что-то записал, ставит куку на REPLICA_STICKY_SECONDS:
+    пока она жива, read_only_view читают с основной базы, и пользователь
+    видит свой пост или комментарий, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = routers.start_request(
+            sticky=routers.STICKY_COOKIE in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request(token)
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                routers.STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+# Сжатые копии из collectstatic в порядке предпочтения
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Файлы с хешем в имени не меняются: кэш на год
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Имена с хешем (из манифеста collectstatic) кэшируются на год как
+    immutable, остальные — на STATIC_MAX_AGE. Если клиент принимает br или
+    gzip и рядом лежит сжатая копия, отдаётся она с Content-Encoding.
+    Файлы, которых нет в STATIC_ROOT, проходят дальше по цепочке.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.hashed = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        prefix = settings.STATIC_URL
+        if (
+            settings.STATIC_ROOT and request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(prefix)
+        ):
+            response = self.serve(request, request.path_info[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        name = posixpath.normpath(unquote(name)).lstrip('/')
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        variants = [
+            (coding, path + suffix) for coding, suffix in STATIC_ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size
+        ):
+            response = HttpResponseNotModified()
+        else:
+            accepted = accepted_encodings(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            coding, served = next(
+                (variant for variant in variants if variant[0] in accepted),
+                (None, path)
+            )
+            response = FileResponse(open(served, 'rb'))
+            response['Content-Type'] = (
+                mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            )
+            if coding is not None:
+                response['Content-Encoding'] = coding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if variants:
+            response['Vary'] = 'Accept-Encoding'
+        if name in self.hashed:
+            response['Cache-Control'] = (
+                f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает ответы gzip или brotli.
+
+    Страницы из кэша (`cache_listing`) сжимаются до сохранения декоратором
+    compress_page и приходят сюда уже с Content-Encoding — повторно их не
+    трогаем, CPU на попадание в кэш не тратится.
+    """
+
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    def process_response(self, request, response):
+        return compress_response(request, response)
+
+
+compress_page = decorator_from_middleware(CompressionMiddleware)
@@ -0,0 +1,83 @@
+import logging
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Сводка по процессу: имя маршрута -> счётчики
+stats = defaultdict(lambda: {
+    'requests': 0, 'queries': 0, 'sql_ms': 0.0, 'max_queries': 0,
+})
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Декоратор: вьюха должна укладываться в `limit` SQL-запросов.
+
+    Лимит из settings.QUERY_BUDGETS по имени маршрута важнее.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def route_name(match):
+    """Имя маршрута по app_name (`posts:index`), а не по namespace."""
+    return ':'.join(match.app_names + [match.url_name or match.view_name])
+
+
+def get_budget(view_name, view_func):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if view_name in budgets:
+        return budgets[view_name]
+    return getattr(view_func, 'query_budget', None)
+
+
+class QueryCounter:
+    """Считает запросы и их время на всех подключениях к базам."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self._stack = ExitStack()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+    def __enter__(self):
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def record(view_name, counter, budget):
+    """Пишет замер в сводку и проверяет бюджет."""
+    entry = stats[view_name]
+    entry['requests'] += 1
+    entry['queries'] += counter.count
+    entry['sql_ms'] += counter.duration * 1000
+    entry['max_queries'] = max(entry['max_queries'], counter.count)
+    if budget is None or counter.count <= budget:
+        return
+    message = (
+        f'{view_name}: {counter.count} SQL-запросов при бюджете {budget}'
+    )
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,91 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+STICKY_COOKIE = 'primary_reads'
+
+
+class RequestState:
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.replica = False
+        self.wrote = False
+
+
+_state = ContextVar('replica_state', default=None)
+
+
+def start_request(sticky):
+    """Заводит состояние маршрутизации на время запроса."""
+    return _state.set(RequestState(sticky))
+
+
+def finish_request(token):
+    """Сбрасывает состояние; возвращает True, если запрос писал в базу."""
+    state = _state.get()
+    _state.reset(token)
+    return state is not None and state.wrote
+
+
+def read_only_view(view):
+    """Вьюха только читает: её запросы уходят на реплики.
+
+    Если пользователь недавно писал (sticky-кука), чтение остаётся на
+    основной базе, чтобы он увидел свои изменения.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None or state.sticky:
+            return view(request, *args, **kwargs)
+        state.replica = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replica = False
+    return wrapper
+
+
+def read_primary(view):
+    """Внутри read_only_view возвращает чтение на основную базу.
+
+    Для рендеров, которые кладутся в кэш по свежей версии ленты: копия
+    с отстающей реплики прожила бы там до следующей правки.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None or not state.replica:
+            return view(request, *args, **kwargs)
+        state.replica = False
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state.replica = True
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтение из read_only_view — на случайную реплику, остальное — на
+    основную базу."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
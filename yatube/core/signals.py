@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Настраивает каждое новое SQLite-соединение (settings.SQLITE_PRAGMAS).
+
+    PRAGMA выполняются на сыром соединении, мимо курсора Django, чтобы не
+    попадать в счётчик запросов и бюджеты вьюх.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
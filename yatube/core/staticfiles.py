@@ -0,0 +1,59 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Что сжимать заранее: текстовые форматы, картинки уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+# Файлы меньше этого не сжимаются: выигрыш меньше заголовков
+MIN_SIZE = 256
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """collectstatic с хешами в именах и сжатыми копиями рядом.
+
+    Для каждого текстового файла пишутся .gz и, если установлен brotli,
+    .br — сервер (core.middleware.StaticFilesMiddleware) отдаёт их без
+    сжатия на лету. Пока collectstatic не запускался (разработка,
+    тесты), url() отдаёт имена без хеша.
+    """
+
+    def url(self, name, force=False):
+        if not self.hashed_files and not force:
+            return FileSystemStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < MIN_SIZE:
+            return
+        for suffix, compress in _compressors():
+            compressed = compress(data)
+            # Сжатая копия нужна, только если она заметно меньше.
+            if len(compressed) > len(data) * 0.95:
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
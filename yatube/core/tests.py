@@ -1,4 +1,33 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache, caches
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from core.asgi import ASGIHandler, build_environ
+from core.benchmark import isolated_caches, run, seed, volumes
+from core.cache import SharedFileCache, TwoTierCache
+from core.compression import compress_response, minify_html
+from core.queries import QueryBudgetExceeded, stats
+from core.routers import (
+    STICKY_COOKIE, ReplicaRouter, finish_request, read_only_view,
+    read_primary, start_request
+)
+from core.signals import tune_sqlite
+from posts.caching import cache_listing, get_version, get_versions, version_key
+from posts.models import Group, Post, User
 
 
 class ViewTestClass(TestCase):
@@ -6,3 +35,411 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, 404)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class BenchmarkTestClass(TestCase):
+    def test_benchmark_covers_routes(self):
+        seed(users=5, groups=2, posts=30, comments=30, follows=6)
+        self.assertEqual(volumes()['posts'], 30)
+        results = run(repeat=2)
+        self.assertIn('posts:index', results)
+        self.assertIn('users:login', results)
+        self.assertIn('about:tech', results)
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertLessEqual(result['p50_ms'], result['max_ms'])
+                self.assertTrue(
+                    all(status < 500 for status in result['status'])
+                )
+
+
+class QueryBudgetTestClass(TestCase):
+    def test_server_timing_header(self):
+        """Ответ содержит число запросов и время SQL"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn('queries', response['Server-Timing'])
+        self.assertGreater(stats['posts:index']['requests'], 0)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0})
+    def test_budget_exceeded(self):
+        """Превышение бюджета роняет запрос"""
+        cache.clear()
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+
+class TwoTierCacheTestClass(TestCase):
+    def setUp(self):
+        self.cache = TwoTierCache(None, {'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 2,
+            'LOCAL_TIMEOUT': 60,
+            'SHARED_ONLY_PREFIXES': ['listing_version:'],
+        }})
+        self.shared = caches['shared']
+        self.cache.clear()
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Повторное чтение идёт из LRU процесса"""
+        self.cache.set('card', 'html')
+        self.assertEqual(self.cache.get('card'), 'html')
+        self.shared.set('card', 'из другого воркера')
+        self.assertEqual(self.cache.get('card'), 'html')
+        self.assertEqual(self.cache.get_stats()['local']['hits'], 2)
+
+    def test_tests_use_own_shared_cache(self):
+        """Тесты и замеры не очищают общий кэш работающего сайта"""
+        live = os.path.join(tempfile.gettempdir(), 'yatube-cache')
+        self.assertNotEqual(settings.CACHES['shared']['LOCATION'], live)
+        self.assertEqual(
+            isolated_caches('/tmp/bench')['shared']['LOCATION'], '/tmp/bench'
+        )
+
+    def test_evicted_version_not_reused(self):
+        """Вытесненная версия ленты не начинается заново с того же числа"""
+        first = get_version('index')
+        cache.delete(version_key('index'))
+        self.assertNotEqual(get_version('index'), first)
+        cache.delete(version_key('index'))
+        [second] = get_versions(['index'])
+        self.assertNotIn(second, (first, 1))
+        self.assertEqual(get_version('index'), second)
+
+    def test_lru_is_bounded(self):
+        """Старые записи вытесняются из LRU, но остаются в общем кэше"""
+        for key in ('first', 'second', 'third'):
+            self.cache.set(key, key)
+        self.assertEqual(len(self.cache.local), 2)
+        self.assertEqual(self.cache.get('first'), 'first')
+        self.assertEqual(self.cache.get_stats()['shared']['hits'], 1)
+
+    def test_versions_are_shared(self):
+        """Версии лент видны другим воркерам сразу"""
+        self.cache.set('listing_version:index', 1)
+        self.shared.incr('listing_version:index')
+        self.assertEqual(self.cache.get('listing_version:index'), 2)
+        self.cache.incr('listing_version:index')
+        self.assertEqual(
+            self.cache.get_many(['listing_version:index']),
+            {'listing_version:index': 3}
+        )
+
+
+class SharedFileCacheTestClass(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache = SharedFileCache(self.dir, {'OPTIONS': {
+            'MAX_ENTRIES': 3, 'CULL_EVERY': 5,
+        }})
+
+    def test_concurrent_incr_not_lost(self):
+        """Одновременные сдвиги версии из разных потоков не теряются"""
+        self.cache.set('listing_version:index', 0, None)
+
+        def bump():
+            for _ in range(25):
+                self.cache.incr('listing_version:index')
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('listing_version:index'), 200)
+
+    def test_cull_checked_every_n_writes(self):
+        """Каталог обходится не при каждой записи"""
+        with mock.patch.object(
+            self.cache, '_list_cache_files', wraps=self.cache._list_cache_files
+        ) as listing:
+            for number in range(10):
+                self.cache.set(f'page:{number}', number)
+        self.assertEqual(listing.call_count, 2)
+        self.assertLessEqual(len(self.cache._list_cache_files()), 10)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTestClass(TestCase):
+    def read_alias(self, sticky=False):
+        @read_only_view
+        def view(request):
+            return ReplicaRouter().db_for_read(Post)
+
+        token = start_request(sticky)
+        try:
+            return view(None)
+        finally:
+            finish_request(token)
+
+    def test_read_only_view_reads_replica(self):
+        """Чтение из read_only_view уходит на реплику, запись — на основную"""
+        self.assertEqual(self.read_alias(), 'replica1')
+        self.assertEqual(ReplicaRouter().db_for_read(Post), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(Post), 'default')
+
+    def test_cache_fill_reads_primary(self):
+        """Страница, которая ляжет в кэш ленты, рисуется по основной базе"""
+        aliases = []
+
+        @read_only_view
+        @cache_listing('replica-test')
+        def view(request):
+            aliases.append(ReplicaRouter().db_for_read(Post))
+            return HttpResponse()
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        token = start_request(False)
+        try:
+            view(request)
+            self.assertEqual(aliases, ['default'])
+            self.assertEqual(
+                read_only_view(read_primary(read_only_view(
+                    lambda request: ReplicaRouter().db_for_read(Post)
+                )))(None),
+                'replica1',
+            )
+        finally:
+            finish_request(token)
+
+    def test_sticky_reads_primary(self):
+        """После записи пользователь читает с основной базы"""
+        self.assertEqual(self.read_alias(sticky=True), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['default'])
+    def test_write_sets_sticky_cookie(self):
+        """Запрос с записью ставит куку, чтение — нет"""
+        user = User.objects.create_user(username='writer')
+        post = Post.objects.create(author=user, text='Пост')
+        self.client.force_login(user)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Да'}
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+
+class SQLiteTuningTestClass(TestCase):
+    def test_pragmas_applied(self):
+        """Новое соединение получает PRAGMA из настроек"""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            timeout = cursor.fetchone()[0]
+            self.assertEqual(timeout, settings.SQLITE_PRAGMAS['busy_timeout'])
+            with override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234}):
+                tune_sqlite(sender=None, connection=connection)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 1234)
+            cursor.execute(f'PRAGMA busy_timeout = {timeout}')
+
+
+class ASGITestClass(TestCase):
+    def test_build_environ(self):
+        """Заголовки и путь ASGI превращаются в WSGI-окружение"""
+        environ = build_environ({
+            'type': 'http',
+            'method': 'POST',
+            'path': '/group/тест/',
+            'query_string': b'page=2',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+            ],
+        }, b'body')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/group/тест/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['wsgi.input'].read(), b'body')
+
+    def test_build_environ_joins_cookies(self):
+        """Несколько заголовков Cookie склеиваются через '; '"""
+        environ = build_environ({
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'headers': [
+                (b'cookie', b'sessionid=abc'),
+                (b'cookie', b'csrftoken=xyz'),
+            ],
+        }, b'')
+        self.assertEqual(
+            environ['HTTP_COOKIE'], 'sessionid=abc; csrftoken=xyz'
+        )
+        request = WSGIRequest(environ)
+        self.assertEqual(request.COOKIES, {
+            'sessionid': 'abc', 'csrftoken': 'xyz',
+        })
+
+    def test_handler_serves_page(self):
+        """ASGI-приложение отдаёт страницу из пула потоков"""
+        app = ASGIHandler(max_threads=2)
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(app({
+                'type': 'http',
+                'method': 'GET',
+                'path': reverse('about:author'),
+                'headers': [(b'host', b'testserver')],
+            }, receive, send))
+        finally:
+            loop.close()
+            app.executor.shutdown()
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'),
+            messages[0]['headers']
+        )
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn(b'<html', body)
+        self.assertFalse(messages[-1].get('more_body', False))
+
+
+class StaticFilesTestClass(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings = override_settings(STATIC_ROOT=cls.root)
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_names_in_templates(self):
+        """Шаблоны ссылаются на имена с хешем"""
+        hashed = staticfiles_storage.url('css/bootstrap.min.css')
+        self.assertRegex(hashed, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        response = self.get(reverse('about:author'))
+        self.assertContains(response, hashed)
+
+    def test_hashed_file_cached_forever(self):
+        """Файл с хешем отдаётся сжатым и кэшируется навсегда"""
+        url = staticfiles_storage.url('css/bootstrap.min.css')
+        response = self.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open('css/bootstrap.min.css') as source:
+            self.assertEqual(body, source.read())
+
+    def test_plain_file(self):
+        """Без Accept-Encoding и хеша — исходный файл и короткий кэш"""
+        response = self.get('/static/css/bootstrap.min.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        response = self.get(
+            '/static/css/bootstrap.min.css',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_outside_root(self):
+        """Пути за пределы STATIC_ROOT не отдаются"""
+        response = self.get('/static/../../etc/passwd')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionTestClass(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_minify_html(self):
+        """Отступы и комментарии убираются, pre/textarea/script — нет"""
+        html = (
+            '<div>\n    <!-- служебное -->\n    <p>Текст  с  пробелами</p>\n'
+            '  <pre>  код\n    отступ</pre>\n'
+            '  <textarea>\n  ввод</textarea>\n'
+            '  <script>\n  // комментарий\n  go();\n</script>\n</div>'
+        )
+        self.assertEqual(minify_html(html), (
+            '<div>\n<p>Текст  с  пробелами</p>\n'
+            '<pre>  код\n    отступ</pre>\n'
+            '<textarea>\n  ввод</textarea>\n'
+            '<script>\n  // комментарий\n  go();\n</script>\n</div>'
+        ))
+
+    def test_gzip_by_accept_encoding(self):
+        """Сжатие только для клиентов, которые его принимают"""
+        address = reverse('about:author')
+        response = self.client.get(address)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        plain = response.content
+        self.assertNotIn(b'\n  ', plain)
+
+        response = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+
+        response = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cached_page_compressed_once(self):
+        """Лента из кэша отдаётся сжатой без повторного сжатия"""
+        address = reverse('posts:index')
+        with mock.patch(
+            'core.compression.gzip.compress', wraps=gzip.compress
+        ) as compress:
+            first = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+
+    def test_cached_group_page_etag_weak(self):
+        """ETag сжатой страницы группы из кэша — слабый"""
+        Group.objects.create(title='Матрица', slug='matrix')
+        address = reverse('posts:group_list', args=['matrix'])
+        for _ in range(2):
+            response = self.client.get(address, HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            address, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_streaming_gzip_only_if_accepted(self):
+        """Поток сжимается gzip, только если клиент принимает gzip"""
+        for header, encoding in (('br', None), ('br, gzip', 'gzip')):
+            with self.subTest(header=header), mock.patch(
+                'core.compression.brotli', mock.Mock()
+            ):
+                request = RequestFactory().get(
+                    '/', HTTP_ACCEPT_ENCODING=header
+                )
+                response = compress_response(
+                    request,
+                    StreamingHttpResponse(iter([b'a' * 1000]))
+                )
+                self.assertEqual(response.get('Content-Encoding'), encoding)
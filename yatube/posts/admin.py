@@ -1,6 +1,8 @@
 from django.contrib import admin
 
 from .models import Post, Group, Comment, Follow
+from .paginator import CachedCountPaginator
+from .search import matching_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +18,14 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск через полнотекстовый индекс вместо icontains."""
+        if not search_term:
+            return queryset, False
+        return matching_posts(queryset, search_term), False
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -36,6 +46,8 @@ class CommentAdmin(admin.ModelAdmin):
     )
     search_fields = ('text',)
     empty_value_display = '-пусто-'
+    paginator = CachedCountPaginator
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -44,6 +56,8 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author',
     )
+    paginator = CachedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Post, PostAdmin)
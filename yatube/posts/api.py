@@ -0,0 +1,176 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from core.queries import query_budget
+from .counters import get_stats
+from .models import Follow, Group, Post, User
+from .paginator import CursorPaginator
+
+page_size: int = 20
+
+POST_FIELDS = (
+    'pk', 'text', 'pub_date', 'image', 'comment_count',
+    'author__username', 'group__slug',
+)
+
+
+def post_data(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'image': post.image.url if post.image else None,
+        'comment_count': post.comment_count,
+    }
+
+
+def comment_data(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'pub_date': comment.pub_date,
+    }
+
+
+def json_response(request, data):
+    """JSON с ETag по содержимому и Cache-Control.
+
+    Совпавший If-None-Match получает пустой 304 — клиенту, который
+    опрашивает API, не нужно заново скачивать и разбирать ответ.
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    etag = '"{}"'.format(hashlib.md5(body.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+    patch_cache_control(
+        response, public=True, max_age=settings.API_CACHE_MAX_AGE
+    )
+    return response
+
+
+def post_page(request, queryset):
+    paginator = CursorPaginator(
+        queryset.select_related('author', 'group').only(*POST_FIELDS),
+        page_size,
+        after=request.GET.get('after'),
+    )
+    page = paginator.get_page()
+    return {
+        'results': [post_data(post) for post in page],
+        'next': paginator.next_cursor,
+    }
+
+
+@require_safe
+@query_budget(3)
+def post_list(request):
+    return json_response(request, post_page(request, Post.objects.all()))
+
+
+@require_safe
+@query_budget(3)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group').only(*POST_FIELDS),
+        pk=post_id
+    )
+    return json_response(request, post_data(post))
+
+
+@require_safe
+@query_budget(4)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    paginator = CursorPaginator(
+        post.comments.select_related('author').only(
+            'pk', 'text', 'pub_date', 'author__username'
+        ).order_by(*CursorPaginator.ordering),
+        page_size,
+        after=request.GET.get('after'),
+    )
+    page = paginator.get_page()
+    return json_response(request, {
+        'results': [comment_data(comment) for comment in page],
+        'next': paginator.next_cursor,
+    })
+
+
+@require_safe
+@query_budget(3)
+def group_detail(request, slug):
+    group = get_object_or_404(
+        Group.objects.only('slug', 'title', 'description', 'post_count'),
+        slug=slug
+    )
+    return json_response(request, {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+        'post_count': group.post_count,
+    })
+
+
+@require_safe
+@query_budget(4)
+def group_posts(request, slug):
+    group = get_object_or_404(Group.objects.only('pk'), slug=slug)
+    return json_response(request, post_page(request, group.posts.all()))
+
+
+@require_safe
+@query_budget(3)
+def profile_detail(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats').only(
+            'pk', 'username', 'first_name', 'last_name',
+            'stats__posts', 'stats__followers', 'stats__following',
+        ),
+        username=username
+    )
+    stats = get_stats(author)
+    return json_response(request, {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts': stats.posts,
+        'followers': stats.followers,
+        'following': stats.following,
+    })
+
+
+@require_safe
+@query_budget(4)
+def profile_posts(request, username):
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    return json_response(request, post_page(request, author.author.all()))
+
+
+@require_safe
+@query_budget(4)
+def profile_following(request, username):
+    """Подписки пользователя, курсор — id подписки."""
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    follows = Follow.objects.filter(user=author).order_by('-pk')
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        follows = follows.filter(pk__lt=int(after))
+    rows = list(
+        follows.values_list('pk', 'author__username')[:page_size + 1]
+    )
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return json_response(request, {
+        'results': [username for _, username in rows],
+        'next': str(rows[-1][0]) if has_more else None,
+    })
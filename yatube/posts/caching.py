@@ -0,0 +1,158 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.cache import cache_page
+
+from core.middleware import compress_page
+from core.routers import read_primary
+
+
+def version_key(listing):
+    return f'listing_version:{listing}'
+
+
+def _seed():
+    # Не 1: ключ версии может вытесниться из кэша, и новая версия не
+    # должна совпасть с уже выданной, иначе вернутся старые страницы.
+    return time.time_ns()
+
+
+def get_version(listing):
+    """Текущая версия ленты; меняется при каждом изменении её постов."""
+    return cache.get_or_set(version_key(listing), _seed, None)
+
+
+def _incr(listing):
+    # incr и add атомарны в общем кэше (core.cache.SharedFileCache):
+    # одновременные сдвиги не теряются. Если add не прошёл, версию
+    # только что завёл другой воркер — она уже новая.
+    try:
+        cache.incr(version_key(listing))
+    except ValueError:
+        cache.add(version_key(listing), _seed(), None)
+
+
+def changed_key(listing):
+    return f'listing_changed:{listing}'
+
+
+def touch(*listings):
+    """Запоминает время изменения лент для Last-Modified.
+
+    Нужно там, где max(updated_at) не сдвигается: удаления и счётчики.
+    Кэш страниц при этом не сбрасывается.
+    """
+    now = timezone.now()
+    cache.set_many({changed_key(name): now for name in listings}, None)
+
+
+def changed_at(*listings):
+    """Время последнего изменения любой из лент.
+
+    Если время вытеснилось из кэша, им становится текущий момент:
+    лишний 200 лучше, чем 304 на устаревшую страницу.
+    """
+    keys = [changed_key(name) for name in listings]
+    stamps = cache.get_many(keys)
+    missing = {key: timezone.now() for key in keys if key not in stamps}
+    if missing:
+        cache.set_many(missing, None)
+        stamps.update(missing)
+    return max(stamps.values())
+
+
+def _bump(listings):
+    for listing in listings:
+        _incr(listing)
+    touch(*listings)
+
+
+def bump(*listings):
+    """Инвалидирует кэш лент и сдвигает время их изменения.
+
+    Версия сдвигается сразу и ещё раз после коммита: страница,
+    закэшированная между ними по старым данным, тоже становится
+    недоступной.
+    """
+    _bump(listings)
+    transaction.on_commit(lambda: _bump(listings))
+
+
+def get_versions(listings):
+    """Версии нескольких лент одним обращением к кэшу."""
+    keys = [version_key(name) for name in listings]
+    versions = cache.get_many(keys)
+    missing = {key: _seed() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def group_listing(slug):
+    return f'group:{slug}'
+
+
+def author_listing(author_id):
+    return f'author:{author_id}'
+
+
+def follows_listing(user_id):
+    return f'follows:{user_id}'
+
+
+def comments_listing(post_id):
+    return f'comments:{post_id}'
+
+
+def cache_listing(listing):
+    """Как `cache_page`, но с ключом, привязанным к версии ленты.
+
+    `listing` — имя ленты или функция от аргументов вьюхи. В кэш
+    попадает уже минифицированный и сжатый ответ (compress_page),
+    отрисованный по основной базе (read_primary).
+    Шапка страницы зависит от читателя, поэтому ключ тоже: у гостей
+    одна копия на всех, у пользователя своя.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            name = listing(**kwargs) if callable(listing) else listing
+            viewer = request.user.pk or 'anon'
+            prefix = f'{name}:{get_version(name)}:{viewer}'
+            cached_view = cache_page(
+                settings.LISTING_CACHE_TIMEOUT, key_prefix=prefix
+            )(compress_page(read_primary(view)))
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_user_listing(listings):
+    """Как `cache_listing`, но для ленты, собранной из многих.
+
+    `listings` — функция от пользователя, отдающая имена лент-источников.
+    Ключ — пользователь и хэш версий всех источников, поэтому изменение
+    любого из них сбрасывает кэш без перебора читателей.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            names = listings(request.user)
+            stamp = ','.join(
+                f'{name}={version}'
+                for name, version in zip(names, get_versions(names))
+            )
+            digest = hashlib.md5(stamp.encode()).hexdigest()
+            cached_view = cache_page(
+                settings.LISTING_CACHE_TIMEOUT,
+                key_prefix=f'user:{request.user.pk}:{digest}',
+            )(compress_page(read_primary(view)))
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
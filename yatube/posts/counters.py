@@ -0,0 +1,110 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def user_counts(user_id):
+    """Считает счётчики пользователя заново по таблицам."""
+    return {
+        'posts': Post.objects.filter(author_id=user_id).count(),
+        'followers': Follow.objects.filter(author_id=user_id).count(),
+        'following': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def get_stats(user):
+    """Счётчики пользователя; при отсутствии строки она заполняется.
+
+    Если счётчики подтянуты через select_related('stats'), запроса нет.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        stats, _ = UserStats.objects.get_or_create(
+            user_id=user.pk, defaults=user_counts(user.pk)
+        )
+        return stats
+
+
+def _shift(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def bump_user(user_id, create=True, **deltas):
+    """Сдвигает счётчики пользователя.
+
+    Если строки ещё нет, она создаётся пересчётом (`create=False` — при
+    удалениях, когда сам пользователь может удаляться каскадом).
+    """
+    updated = _shift(UserStats.objects.filter(user_id=user_id), **deltas)
+    if not updated and create:
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults=user_counts(user_id)
+        )
+
+
+def bump_group(group_id, delta):
+    if group_id is not None:
+        _shift(Group.objects.filter(pk=group_id), post_count=delta)
+
+
+def bump_post(post_id, delta):
+    _shift(Post.objects.filter(pk=post_id), comment_count=delta)
+
+
+def _count_of(model, field):
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _reconcile_users(start, stop):
+    rows = User.objects.filter(pk__gte=start, pk__lt=stop).annotate(
+        actual_posts=_count_of(Post, 'author'),
+        actual_followers=_count_of(Follow, 'author'),
+        actual_following=_count_of(Follow, 'user'),
+    ).values_list(
+        'pk', 'actual_posts', 'actual_followers', 'actual_following',
+        'stats__posts', 'stats__followers', 'stats__following',
+    )
+    fixed = 0
+    for pk, *values in rows:
+        actual, stored = values[:3], values[3:]
+        if actual == stored:
+            continue
+        UserStats.objects.update_or_create(user_id=pk, defaults=dict(
+            zip(('posts', 'followers', 'following'), actual)
+        ))
+        fixed += 1
+    return fixed
+
+
+def _drift(queryset, field, annotation):
+    return queryset.annotate(actual=annotation).exclude(
+        **{field: F('actual')}
+    ).values_list('pk', 'actual')
+
+
+def reconcile(model, start, stop):
+    """Исправляет расхождения счётчиков для pk в [start, stop).
+
+    Возвращает число исправленных строк.
+    """
+    if model is User:
+        return _reconcile_users(start, stop)
+    if model is Group:
+        field, annotation = 'post_count', _count_of(Post, 'group')
+    else:
+        field, annotation = 'comment_count', _count_of(Comment, 'post')
+    rows = _drift(
+        model.objects.filter(pk__gte=start, pk__lt=stop),
+        field, annotation
+    )
+    for pk, actual in rows:
+        model.objects.filter(pk=pk).update(**{field: actual})
+    return len(rows)
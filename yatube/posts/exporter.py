@@ -0,0 +1,82 @@
+import csv
+import json
+
+from django.db.models import F, Q
+
+from .paginator import CursorPaginator
+
+FIELDS = ('id', 'author', 'group', 'pub_date', 'text', 'image')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def iter_posts(queryset, chunk_size=1000):
+    """Все посты queryset окнами по ключу (pub_date, id).
+
+    Каждое окно — отдельный запрос по индексу ленты, строки читаются
+    через .iterator(), поэтому в памяти не больше одного окна.
+    """
+    rows = queryset.order_by(*CursorPaginator.ordering).annotate(
+        author_name=F('author__username'), group_slug=F('group__slug')
+    ).values_list(
+        'pk', 'author_name', 'group_slug', 'pub_date', 'text', 'image'
+    )
+    window = rows
+    while True:
+        last = None
+        for row in window[:chunk_size].iterator(chunk_size=chunk_size):
+            last = row
+            yield row
+        if last is None:
+            return
+        pub_date, pk = last[3], last[0]
+        window = rows.filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+        )
+
+
+def _as_dict(row):
+    pk, author, group, pub_date, text, image = row
+    return {
+        'id': pk,
+        'author': author,
+        'group': group,
+        'pub_date': pub_date.isoformat(),
+        'text': text,
+        'image': image or None,
+    }
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: отдаёт строку обратно."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            '' if value is None else value
+            for value in _as_dict(row).values()
+        ])
+
+
+def render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(_as_dict(row), ensure_ascii=False) + '\n'
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'jsonl': render_jsonl,
+}
+
+
+def export(queryset, fmt, chunk_size=1000):
+    """Генератор строк выгрузки в формате `fmt` ('csv' или 'jsonl')."""
+    return RENDERERS[fmt](iter_posts(queryset, chunk_size))
@@ -1,4 +1,9 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.template.defaultfilters import filesizeformat
+
+from . import images
 from .models import Post, Comment
 
 
@@ -19,6 +24,30 @@ class PostForm(forms.ModelForm):
             "group": ('Группа'),
         }
 
+    def clean_image(self):
+        """Отсекает огромные файлы и нормализует картинку до сохранения."""
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        # Сначала дешёвые проверки: размер файла и размеры из заголовка,
+        # без декодирования пикселей.
+        if image.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise forms.ValidationError(
+                'Файл больше %(limit)s',
+                params={
+                    'limit': filesizeformat(settings.IMAGE_UPLOAD_MAX_BYTES)
+                },
+                code='file_too_large',
+            )
+        width, height = image.image.size
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Картинка больше %(limit)d мегапикселей',
+                params={'limit': settings.IMAGE_UPLOAD_MAX_PIXELS // 10 ** 6},
+                code='too_many_pixels',
+            )
+        return images.normalize(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
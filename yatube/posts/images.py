@@ -0,0 +1,66 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Форматы, которые сохраняются как есть; остальные (BMP, TIFF…)
+# перекодируются в PNG при прозрачности и в JPEG без неё.
+WEB_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png'}
+# Что остаётся от метаданных: профиль цвета и прозрачность палитры
+KEEP_INFO = ('icc_profile', 'transparency')
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def _encode(image, fmt):
+    options = {}
+    if fmt == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = {'optimize': True, 'progressive': True}
+    elif fmt == 'PNG':
+        options = {'optimize': True}
+    if fmt in ('JPEG', 'WEBP'):
+        options['quality'] = settings.IMAGE_QUALITY
+    # Цветовой профиль сохраняем, иначе поедут цвета.
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def normalize(upload):
+    """Готовит загруженную картинку к хранению.
+
+    Поворачивает по EXIF, уменьшает до IMAGE_MAX_SIDE по большей стороне,
+    пересжимает с IMAGE_QUALITY и отбрасывает метаданные. Анимированные
+    GIF и WebP остаются как есть.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if getattr(image, 'is_animated', False):
+        upload.seek(0)
+        return upload
+    fmt = image.format
+    image = ImageOps.exif_transpose(image)
+    side = settings.IMAGE_MAX_SIDE
+    image.thumbnail((side, side), Image.LANCZOS)
+    # Некоторые кодеки берут EXIF и комментарии из info, если их не
+    # передали явно: оставляем только то, что нужно для отображения.
+    image.info = {
+        key: value for key, value in image.info.items()
+        if key in KEEP_INFO
+    }
+    name = upload.name
+    if fmt not in WEB_FORMATS:
+        fmt = 'PNG' if _has_alpha(image) else 'JPEG'
+        name = os.path.splitext(name)[0] + EXTENSIONS[fmt]
+    return ContentFile(_encode(image, fmt), name=name)
@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+
+from . import caching, counters, images, search, thumbnails, timeline
+from .models import Group, Post, User
+
+FORMATS = ('jsonl', 'csv')
+
+
+class RowError(Exception):
+    """Строка не может быть импортирована."""
+
+
+def read_rows(stream, fmt):
+    """Построчно читает JSONL или CSV; отдаёт пары (номер строки, dict).
+
+    Ошибка кодировки обрывает чтение: она отдаётся как ошибка строки,
+    уже прочитанные строки импортируются.
+    """
+    number = 0
+    try:
+        for number, row in _parse(stream, fmt):
+            yield number, row
+    except UnicodeDecodeError as error:
+        yield number + 1, RowError(
+            f'файл не в UTF-8 ({error.reason}), чтение прервано'
+        )
+
+
+def _parse(stream, fmt):
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=2):
+            yield number, row
+        return
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, RowError(f'неверный JSON: {error}')
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError('строка должна быть JSON-объектом')
+            continue
+        yield number, row
+
+
+class Lookup:
+    """Кэш «ключ -> pk»: недостающие ключи пачки добираются одним запросом.
+
+    Память растёт с числом разных авторов и групп, а не строк.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.known = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key and key not in self.known}
+        if missing:
+            self.known.update(
+                self.queryset.filter(
+                    **{f'{self.field}__in': missing}
+                ).values_list(self.field, 'pk')
+            )
+
+    def get(self, key):
+        return self.known.get(key)
+
+
+@contextmanager
+def keep_pub_date():
+    """Даёт bulk_create сохранить дату публикации из файла.
+
+    auto_now_add перезаписывает её в pre_save, поэтому на время
+    импорта он отключается. Команда работает в отдельном процессе.
+    """
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class PostImporter:
+    """Потоковый импорт постов пачками через bulk_create."""
+
+    def __init__(self, batch_size=1000, images_dir=None, on_error=None):
+        self.batch_size = batch_size
+        self.images_dir = images_dir
+        self.on_error = on_error
+        self.authors = Lookup(User.objects.all(), 'username')
+        self.groups = Lookup(Group.objects.all(), 'slug')
+        self.imported = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.imported / elapsed if elapsed else 0.0
+
+    def _image(self, name):
+        # Те же проверки и нормализация, что у загрузки через PostForm.
+        path = os.path.join(self.images_dir, os.path.basename(name))
+        if not os.path.isfile(path):
+            raise RowError(f'нет файла картинки {name}')
+        if os.path.getsize(path) > settings.IMAGE_UPLOAD_MAX_BYTES:
+            raise RowError(f'файл картинки {name} слишком большой')
+        with open(path, 'rb') as source:
+            try:
+                with Image.open(source) as image:
+                    width, height = image.size
+                if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+                    raise RowError(f'в картинке {name} слишком много пикселей')
+                content = images.normalize(
+                    File(source, name=os.path.basename(name))
+                )
+            except (OSError, Image.DecompressionBombError) as error:
+                raise RowError(f'не картинка {name}: {error}')
+            return default_storage.save(f'posts/{content.name}', content)
+
+    def _build(self, row):
+        if isinstance(row, Exception):
+            raise row
+        text = (row.get('text') or '').strip()
+        if not text:
+            raise RowError('пустой текст')
+        author_id = self.authors.get(row.get('author'))
+        if author_id is None:
+            raise RowError(f'нет автора {row.get("author")!r}')
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(row['group'])
+            if group_id is None:
+                raise RowError(f'нет группы {row["group"]!r}')
+        pub_date = timezone.now()
+        if row.get('pub_date'):
+            pub_date = parse_datetime(row['pub_date'])
+            if pub_date is None:
+                raise RowError(f'неверная дата {row["pub_date"]!r}')
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        # Картинка — последней: строка с другими ошибками её не сохраняет.
+        image = ''
+        if row.get('image') and self.images_dir:
+            image = self._image(row['image'])
+        return Post(
+            text=text, author_id=author_id, group_id=group_id,
+            pub_date=pub_date, image=image,
+        )
+
+    def _import_batch(self, batch):
+        rows = [row for _, row in batch if isinstance(row, dict)]
+        self.authors.resolve({row.get('author') for row in rows})
+        self.groups.resolve({row.get('group') for row in rows})
+        posts = []
+        for number, row in batch:
+            try:
+                posts.append(self._build(row))
+            except RowError as error:
+                self.skipped += 1
+                if self.on_error is not None:
+                    self.on_error(number, error)
+        if not posts:
+            return
+        try:
+            with transaction.atomic():
+                # bulk_create в SQLite не возвращает pk: новые посты
+                # находятся по диапазону после прежнего максимума.
+                start = (
+                    Post.objects.aggregate(last=Max('pk'))['last'] or 0
+                ) + 1
+                with keep_pub_date():
+                    Post.objects.bulk_create(posts)
+                self._derive(start)
+        except Exception:
+            # Пачка откатилась: её картинки в хранилище никому не нужны.
+            for post in posts:
+                if post.image:
+                    default_storage.delete(post.image.name)
+            raise
+        self.imported += len(posts)
+
+    def _derive(self, start):
+        # bulk_create не шлёт сигналы: счётчики, ленты, поиск, кэш
+        # и очередь миниатюр обновляются здесь, по пачке целиком.
+        created = list(
+            Post.objects.filter(pk__gte=start).order_by('pk').only(
+                'pk', 'author_id', 'group_id', 'pub_date', 'image'
+            )
+        )
+        authors = Counter(post.author_id for post in created)
+        for author_id, total in authors.items():
+            counters.bump_user(author_id, posts=total)
+        groups = Counter(post.group_id for post in created if post.group_id)
+        for group_id, total in groups.items():
+            counters.bump_group(group_id, total)
+        timeline.fan_out_many(created)
+        search.index_posts(start, created[-1].pk + 1)
+        thumbnails.enqueue_images(
+            {post.image.name for post in created if post.image}
+        )
+        slugs = Group.objects.filter(pk__in=groups).values_list(
+            'slug', flat=True
+        )
+        caching.bump(
+            'index',
+            *map(caching.author_listing, authors),
+            *map(caching.group_listing, slugs)
+        )
+
+    def run(self, rows, progress=None):
+        """Импортирует строки; `progress` вызывается после каждой пачки."""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return self.imported
+            self._import_batch(batch)
+            if progress is not None:
+                progress(self)
@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+ORDERING = ('-pub_date', '-pk')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def feed_queries():
+    """Запросы лент в том виде, в каком их строят пагинаторы.
+
+    Третий элемент — почему допустима сортировка во временном B-дереве,
+    или None, если запрос обязан идти по индексу.
+    """
+    now = timezone.now()
+    older = Q(pub_date__lt=now) | Q(pub_date=now, pk__lt=1)
+    newer = Q(pub_date__gt=now) | Q(pub_date=now, pk__gt=1)
+    limit = 11
+    return [
+        ('index', Post.objects.order_by(*ORDERING)[:limit], None),
+        ('index after',
+         Post.objects.filter(older).order_by(*ORDERING)[:limit], None),
+        ('index before',
+         Post.objects.filter(newer).order_by('pub_date', 'pk')[:limit], None),
+        ('group',
+         Post.objects.filter(group_id=1).order_by(*ORDERING)[:limit], None),
+        ('group after',
+         Post.objects.filter(older, group_id=1).order_by(*ORDERING)[:limit],
+         None),
+        ('profile',
+         Post.objects.filter(author_id=1).order_by(*ORDERING)[:limit], None),
+        ('profile after',
+         Post.objects.filter(older, author_id=1).order_by(*ORDERING)[:limit],
+         None),
+        ('comments',
+         Comment.objects.filter(post_id=1).order_by(*ORDERING)[:limit], None),
+        ('followers', Follow.objects.filter(author_id=1).values('user_id'),
+         None),
+        ('follow feed',
+         TimelineEntry.objects.filter(user_id=1).select_related(
+             'post__author', 'post__group'
+         ).order_by('-pub_date', '-post_id')[:limit],
+         None),
+        ('follow feed after',
+         TimelineEntry.objects.filter(
+             Q(pub_date__lt=now) | Q(pub_date=now, post_id__lt=1),
+             user_id=1,
+         ).order_by('-pub_date', '-post_id')[:limit],
+         None),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет через EXPLAIN QUERY PLAN, что запросы лент идут '
+        'по индексам без сортировки во временном B-дереве'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживается только SQLite')
+        failed = []
+        for name, queryset, allowed_sort in feed_queries():
+            plan = queryset.explain()
+            sorts = TEMP_SORT in plan
+            if (sorts and allowed_sort is None) or 'INDEX' not in plan:
+                failed.append(name)
+                status = 'FAIL'
+            elif sorts:
+                status = 'SORT'
+            else:
+                status = 'OK'
+            self.stdout.write(f'{status:<5}{name}')
+            for line in plan.splitlines():
+                self.stdout.write(f'     {line.split(" ", 3)[-1]}')
+            if sorts and allowed_sort is not None:
+                self.stdout.write(f'     ({allowed_sort})')
+        if failed:
+            raise CommandError(
+                'Запросы без индекса: ' + ', '.join(failed)
+            )
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import RENDERERS, export
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты автора или группы в CSV или JSONL'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author', help='Имя пользователя')
+        source.add_argument('--group', help='Slug группы')
+        parser.add_argument(
+            '--format', choices=RENDERERS, default='csv',
+            help='Формат выгрузки'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько постов читать одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            filters = {'author__username': options['author']}
+            exists = User.objects.filter(username=options['author']).exists()
+        else:
+            filters = {'group__slug': options['group']}
+            exists = Group.objects.filter(slug=options['group']).exists()
+        if not exists:
+            raise CommandError('Автор или группа не найдены')
+        lines = export(
+            Post.objects.filter(**filters),
+            options['format'],
+            options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as target:
+                target.writelines(lines)
+            return
+        for line in lines:
+            self.stdout.write(line, ending='')
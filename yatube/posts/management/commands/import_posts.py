@@ -0,0 +1,60 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import FORMATS, PostImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Потоково импортирует посты из JSONL или CSV (файл или stdin)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с постами; «-» — читать stdin'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению, для stdin jsonl'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять одной транзакцией'
+        )
+        parser.add_argument(
+            '--images',
+            help='Каталог, откуда брать файлы из колонки image'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'jsonl'
+        )
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        else:
+            try:
+                stream = open(path, encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            images_dir=options['images'],
+            on_error=self.report_error,
+        )
+        with stream:
+            importer.run(read_rows(stream, fmt), progress=self.progress)
+        self.stdout.write(
+            f'Импортировано {importer.imported} постов, '
+            f'пропущено {importer.skipped}, '
+            f'{importer.rate:.0f} строк/с'
+        )
+
+    def progress(self, importer):
+        self.stdout.write(
+            f'{importer.imported} постов, {importer.rate:.0f} строк/с'
+        )
+
+    def report_error(self, number, error):
+        self.stderr.write(f'строка {number}: {error}')
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import ThumbnailTask
+from posts.thumbnails import process
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди миниатюр: генерирует отложенные миниатюры постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать очередь и выйти'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=50,
+            help='Сколько заданий брать за раз'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            tasks = list(
+                ThumbnailTask.objects.filter(failed=False)[:options['batch']]
+            )
+            for task in tasks:
+                ok = process(task)
+                self.stdout.write(
+                    f'{task}: {"готово" if ok else "ошибка"}'
+                )
+            if not tasks:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
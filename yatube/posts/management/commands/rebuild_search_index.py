@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import fts_available, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Размер порции при чтении постов и комментариев'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild(chunk_size=options['chunk_size'])
+        backend = 'FTS5' if fts_available() else 'SearchTerm'
+        self.stdout.write(f'Проиндексировано {total} записей ({backend})')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from posts.counters import reconcile
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с таблицами и чинит расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько строк сверять в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        chunk = options['chunk_size']
+        for model in (User, Group, Post):
+            last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            fixed = 0
+            for start in range(0, last + 1, chunk):
+                with transaction.atomic():
+                    fixed += reconcile(model, start, start + chunk)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: исправлено {fixed}'
+            )
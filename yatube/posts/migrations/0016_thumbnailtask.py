@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailTask',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.CharField(max_length=255, verbose_name='Исходный файл')),
+                ('geometry', models.CharField(max_length=64, verbose_name='Геометрия')),
+                ('options', models.CharField(max_length=255, verbose_name='Опции')),
+                ('failed', models.BooleanField(default=False, verbose_name='Не удалось')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='thumbnailtask',
+            constraint=models.UniqueConstraint(fields=('image', 'geometry', 'options'), name='unique_thumbnail_task'),
+        ),
+    ]
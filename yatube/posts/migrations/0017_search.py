@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 01:40
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+
+def create_fts(apps, schema_editor):
+    # Без FTS5 поиск работает по таблице SearchTerm.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_search_fts '
+            'USING fts5(post_id UNINDEXED, body)'
+        )
+    except OperationalError:
+        return
+    schema_editor.execute(
+        'INSERT INTO posts_search_fts (rowid, post_id, body) '
+        'SELECT id * 2, id, text FROM posts_post'
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search_fts (rowid, post_id, body) '
+        'SELECT id * 2 + 1, post_id, text FROM posts_comment'
+    )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_thumbnailtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Вес')),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Comment', verbose_name='Комментарий')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post', verbose_name='Пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchterm',
+            index=models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_popular(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    UserStats.objects.filter(
+        followers__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_timeline_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='pulled',
+            field=models.BooleanField(default=False, verbose_name='Лента через чтение'),
+        ),
+        migrations.RunPython(mark_popular, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,30 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 character_limit = 15
 
 
+class AtomicSaveModel(models.Model):
+    """Сохранение вместе с сигналами (счётчики, ленты) в одной транзакции."""
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
+    post_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
@@ -18,11 +34,15 @@ class Group(models.Model):
         verbose_name_plural = 'groups'
 
 
-class Post(models.Model):
+class Post(AtomicSaveModel):
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -48,6 +68,11 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.text[:character_limit]
@@ -56,9 +81,21 @@ class Post(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты идут по ключу (pub_date, id): индексы покрывают и фильтр,
+        # и сортировку, без временного B-дерева.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'),
+        ]
 
 
-class Comment(models.Model):
+class Comment(AtomicSaveModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -83,11 +120,18 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', '-pub_date', '-id'],
+                name='comment_post_date_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
 
-class Follow(models.Model):
+class Follow(AtomicSaveModel):
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -106,6 +150,115 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'], name='unique_follow')
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user} подписан на {self.author}'
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts = models.PositiveIntegerField('Постов', default=0)
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписок', default=0)
+    # Посты автора не раздаются по лентам, а подмешиваются при чтении.
+    # Ставится, когда подписчиков больше TIMELINE_FANOUT_LIMIT, и не
+    # снимается.
+    pulled = models.BooleanField('Лента через чтение', default=False)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user_id}'
+
+
+class ThumbnailTask(models.Model):
+    """Задание воркеру на генерацию миниатюры."""
+    image = models.CharField('Исходный файл', max_length=255)
+    geometry = models.CharField('Геометрия', max_length=64)
+    options = models.CharField('Опции', max_length=255)
+    failed = models.BooleanField('Не удалось', default=False)
+    created = models.DateTimeField('Дата постановки', auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['image', 'geometry', 'options'],
+                name='unique_thumbnail_task')
+        ]
+
+    def __str__(self):
+        return f'{self.image} {self.geometry}'
+
+
+class SearchTerm(models.Model):
+    """Запись инвертированного индекса поиска (когда нет FTS5)."""
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='search_terms',
+        verbose_name='Комментарий'
+    )
+    weight = models.PositiveIntegerField('Вес', default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'post'], name='search_term_post_idx')
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user}'
@@ -0,0 +1,174 @@
+import base64
+import binascii
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Max, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def encode_cursor(post):
+    """Упаковывает (pub_date, id) поста в непрозрачный токен."""
+    raw = f'{post.pub_date.isoformat()}|{post.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен в (pub_date, id) или возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        pub_date, pk = raw.decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id) без OFFSET и COUNT(*).
+
+    Каждая страница выбирается одним запросом по индексу, поэтому
+    глубокие страницы стоят столько же, сколько первая. Для совместимости
+    с шаблонами возвращается обычный `Page`: номер страницы условный
+    (1 — самая свежая, 2 — любая следующая), а `num_pages` показывает,
+    есть ли страница дальше. `open_ended` означает, что за концом
+    `object_list` могут быть ещё строки, и последняя страница всё равно
+    ссылается дальше.
+    """
+
+    ordering = ('-pub_date', '-pk')
+
+    def __init__(self, object_list, per_page, after=None, before=None,
+                 open_ended=False):
+        super().__init__(object_list, per_page)
+        self.open_ended = open_ended
+        self.after = decode_cursor(after)
+        self.before = None if self.after else decode_cursor(before)
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._number = 1
+        self._has_more = False
+
+    def _slice(self, queryset, limit, key='pk'):
+        """До `limit` строк источника за курсором, в порядке выборки.
+
+        `key` — поле, которое в источнике играет роль id поста.
+        """
+        if self.before:
+            pub_date, pk = self.before
+            return list(queryset.filter(
+                Q(pub_date__gt=pub_date)
+                | Q(pub_date=pub_date, **{f'{key}__gt': pk})
+            ).order_by('pub_date', key)[:limit])
+        queryset = queryset.order_by('-pub_date', f'-{key}')
+        if self.after:
+            pub_date, pk = self.after
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, **{f'{key}__lt': pk})
+            )
+        return list(queryset[:limit])
+
+    def _rows(self, limit):
+        return self._slice(self.object_list, limit)
+
+    def _fetch(self):
+        rows = self._rows(self.per_page + 1)
+        has_extra = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.before and not has_extra:
+            # Ближе к началу ленты полной страницы нет — отдаём первую.
+            self.before = None
+            return self._fetch()
+        if self.before:
+            rows.reverse()
+            has_previous, has_next = has_extra, True
+        else:
+            has_previous = bool(self.after)
+            has_next = has_extra or self.open_ended
+        if not rows:
+            has_next = False
+        return rows, has_previous, has_next
+
+    def page(self, number=None):
+        rows, has_previous, has_next = self._fetch()
+        self._number = 2 if has_previous else 1
+        self._has_more = has_next
+        if rows:
+            if has_previous:
+                self.previous_cursor = encode_cursor(rows[0])
+            if has_next:
+                self.next_cursor = encode_cursor(rows[-1])
+        return self._get_page(rows, self._number, self)
+
+    def get_page(self, number=None):
+        return self.page()
+
+    def validate_number(self, number):
+        return number
+
+    @property
+    def count(self):
+        """Общее число строк не считается — это и есть смысл пагинатора."""
+        return None
+
+    @property
+    def num_pages(self):
+        return self._number + (1 if self._has_more else 0)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт COUNT(*) из кэша.
+
+    Нужен там, где без номеров страниц не обойтись (админка); ленты сайта
+    идут через CursorPaginator и не считают строки вовсе. Счётчик живёт
+    COUNT_CACHE_TIMEOUT секунд. Для таблицы без фильтров больше
+    COUNT_ESTIMATE_THRESHOLD строк вместо подсчёта берётся оценка по
+    максимальному pk — это один шаг по индексу.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        try:
+            raw = str(queryset.query).encode()
+        except EmptyResultSet:
+            return 0
+        key = f'count:{hashlib.md5(raw).hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = self._count(queryset)
+            cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+    def _count(self, queryset):
+        if not queryset.query.where:
+            estimate = queryset.model._default_manager.aggregate(
+                last=Max('pk')
+            )['last'] or 0
+            if estimate > settings.COUNT_ESTIMATE_THRESHOLD:
+                return estimate
+        return queryset.count()
+
+
+def get_cursor_page(request, post_list, per_page, open_ended=False):
+    """Возвращает страницу ленты по курсорам `?after=` / `?before=`."""
+    paginator = CursorPaginator(
+        post_list,
+        per_page,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        open_ended=open_ended,
+    )
+    return paginator.get_page()
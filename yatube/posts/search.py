@@ -0,0 +1,269 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.utils.functional import cached_property
+
+from .models import Comment, Post, SearchTerm
+from .paginator import CursorPaginator
+
+FTS_TABLE = 'posts_search_fts'
+WORD_RE = re.compile(r'\w+')
+MAX_TERMS = 8
+
+
+def tokenize(text):
+    return [
+        word[:64] for word in WORD_RE.findall(text.lower()) if len(word) > 1
+    ]
+
+
+@lru_cache()
+def _has_fts_table(database):
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def fts_available():
+    """Есть ли в базе таблица FTS5, созданная миграцией."""
+    if connection.vendor != 'sqlite':
+        return False
+    return _has_fts_table(connection.settings_dict['NAME'])
+
+
+# Строки FTS для поста и комментария различаются чётностью rowid,
+# чтобы удалять их по первичному ключу, а не сканированием.
+def _post_rowid(post_id):
+    return post_id * 2
+
+
+def _comment_rowid(comment_id):
+    return comment_id * 2 + 1
+
+
+def _fts_replace(rowid, post_id, body):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, post_id, body) '
+            'VALUES (%s, %s, %s)',
+            [rowid, post_id, body]
+        )
+
+
+def _fts_delete(rowid):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [rowid])
+
+
+def _terms(text, post_id, comment_id=None):
+    return [
+        SearchTerm(
+            term=term, post_id=post_id, comment_id=comment_id, weight=weight
+        )
+        for term, weight in Counter(tokenize(text)).items()
+    ]
+
+
+def index_post(post):
+    if fts_available():
+        _fts_replace(_post_rowid(post.pk), post.pk, post.text)
+        return
+    SearchTerm.objects.filter(post=post, comment__isnull=True).delete()
+    SearchTerm.objects.bulk_create(_terms(post.text, post.pk))
+
+
+def index_posts(start, stop):
+    """Индексирует посты с pk в [start, stop) — после bulk_create."""
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, post_id, body) '
+                f'SELECT id * 2, id, text FROM {Post._meta.db_table} '
+                'WHERE id >= %s AND id < %s',
+                [start, stop]
+            )
+        return
+    for post in Post.objects.filter(pk__gte=start, pk__lt=stop).only(
+        'pk', 'text'
+    ).iterator():
+        index_post(post)
+
+
+def unindex_post(post):
+    if fts_available():
+        _fts_delete(_post_rowid(post.pk))
+
+
+def index_comment(comment):
+    if fts_available():
+        _fts_replace(
+            _comment_rowid(comment.pk), comment.post_id, comment.text
+        )
+        return
+    SearchTerm.objects.filter(comment=comment).delete()
+    SearchTerm.objects.bulk_create(
+        _terms(comment.text, comment.post_id, comment.pk)
+    )
+
+
+def unindex_comment(comment):
+    if fts_available():
+        _fts_delete(_comment_rowid(comment.pk))
+
+
+def clear():
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    SearchTerm.objects.all().delete()
+
+
+def _fts_match(terms):
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _fts_search(terms, after, limit):
+    having, params = '', [_fts_match(terms)]
+    if after is not None:
+        having = 'HAVING rank > %s OR (rank = %s AND post_id > %s)'
+        params += [after[0], after[0], after[1]]
+    sql = (
+        f'SELECT post_id, MIN(rank) AS rank FROM ('
+        f'SELECT post_id, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        f') GROUP BY post_id {having} ORDER BY rank, post_id'
+    )
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(post_id, rank) for post_id, rank in cursor.fetchall()]
+
+
+def _terms_search(terms, after, limit):
+    # Очки инвертированного индекса отрицательные, чтобы порядок
+    # совпадал с bm25 из FTS5: чем меньше, тем релевантнее.
+    rows = SearchTerm.objects.filter(term__in=terms).values(
+        'post_id'
+    ).annotate(
+        score=Sum('weight'), hits=Count('term', distinct=True)
+    ).filter(hits=len(set(terms)))
+    if after is not None:
+        rows = rows.filter(
+            Q(score__lt=-after[0])
+            | Q(score=-after[0], post_id__gt=after[1])
+        )
+    rows = rows.order_by('-score', 'post_id').values_list('post_id', 'score')
+    if limit is not None:
+        rows = rows[:limit]
+    return [(post_id, -score) for post_id, score in rows]
+
+
+def ranked(query, after=None, limit=None):
+    """Пары (post_id, rank) по запросу; меньший rank — выше в выдаче.
+
+    `after` — пара (rank, post_id), после которой продолжать выдачу.
+    """
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms:
+        return []
+    if fts_available():
+        return _fts_search(terms, after, limit)
+    return _terms_search(terms, after, limit)
+
+
+def matching_posts(queryset, query):
+    """Посты `queryset`, в тексте которых есть все слова запроса.
+
+    В отличие от `ranked` — без комментариев и без ранжирования:
+    подзапрос к индексу, а не список id в памяти.
+    """
+    terms = tokenize(query)[:MAX_TERMS]
+    if not terms:
+        return queryset.none()
+    if fts_available():
+        # RawSQL в pk__in дал бы IN ((SELECT …)), а SQLite сравнивает
+        # такое только с первой строкой подзапроса.
+        column = '{}.{}'.format(
+            connection.ops.quote_name(queryset.model._meta.db_table),
+            connection.ops.quote_name(queryset.model._meta.pk.column),
+        )
+        return queryset.extra(
+            where=[
+                f'{column} IN (SELECT post_id FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND rowid = post_id * 2)'
+            ],
+            params=[_fts_match(terms)],
+        )
+    return queryset.filter(pk__in=SearchTerm.objects.filter(
+        term__in=terms, comment__isnull=True
+    ).values('post_id').annotate(
+        hits=Count('term', distinct=True)
+    ).filter(hits=len(set(terms))).values('post_id'))
+
+
+def rebuild(chunk_size=1000):
+    """Перестраивает индекс по всем постам и комментариям."""
+    clear()
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, post_id, body) '
+                f'SELECT id * 2, id, text FROM {Post._meta.db_table}'
+            )
+            total = cursor.rowcount
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, post_id, body) '
+                f'SELECT id * 2 + 1, post_id, text '
+                f'FROM {Comment._meta.db_table}'
+            )
+            return total + cursor.rowcount
+    total = 0
+    for model, index in ((Post, index_post), (Comment, index_comment)):
+        for obj in model.objects.order_by().only(
+            'pk', 'text', *(['post_id'] if model is Comment else [])
+        ).iterator(chunk_size=chunk_size):
+            index(obj)
+            total += 1
+    return total
+
+
+class SearchPaginator(CursorPaginator):
+    """Курсорная выдача поиска по ключу (rank, post_id)."""
+
+    def __init__(self, query, per_page, after=None):
+        super().__init__(Post.objects.none(), per_page)
+        self.query = query
+        self.after = self.decode(after)
+
+    @staticmethod
+    def encode(rank, post_id):
+        return f'{rank!r}:{post_id}'
+
+    @staticmethod
+    def decode(token):
+        try:
+            rank, post_id = token.split(':')
+            return float(rank), int(post_id)
+        except (AttributeError, ValueError):
+            return None
+
+    @cached_property
+    def _rows(self):
+        return ranked(self.query, self.after, self.per_page + 1)
+
+    def page(self, number=None):
+        rows = self._rows[:self.per_page]
+        self._number = 2 if self.after else 1
+        self._has_more = len(self._rows) > self.per_page
+        if self._has_more:
+            self.next_cursor = self.encode(*rows[-1][::-1])
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        object_list = [
+            posts[post_id] for post_id, _ in rows if post_id in posts
+        ]
+        return self._get_page(object_list, self._number, self)
@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import caching, counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, UserStats
+
+# Поля пользователя, которые выводятся в карточках его постов
+CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def bump_post_listings(author_id, *group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    caching.bump(
+        'index',
+        caching.author_listing(author_id),
+        *map(caching.group_listing, slugs)
+    )
+
+
+def touch_follow_profiles(follow):
+    # Счётчики подписок видны в профилях обоих, а постов в них не меняется.
+    caching.touch(
+        caching.author_listing(follow.user_id),
+        caching.author_listing(follow.author_id),
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_old(sender, instance, **kwargs):
+    old = None
+    if instance.pk is not None:
+        old = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image'
+        ).first()
+    instance._old_group_id, instance._old_image = old or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, posts=1)
+        counters.bump_group(instance.group_id, 1)
+        timeline.fan_out(instance)
+    elif instance._old_group_id != instance.group_id:
+        counters.bump_group(instance._old_group_id, -1)
+        counters.bump_group(instance.group_id, 1)
+    bump_post_listings(
+        instance.author_id, instance.group_id, instance._old_group_id
+    )
+    if kwargs.get('update_fields') == frozenset(['updated_at']):
+        return
+    search.index_post(instance)
+    if instance.image and instance.image.name != instance._old_image:
+        thumbnails.enqueue_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, create=False, posts=-1)
+    counters.bump_group(instance.group_id, -1)
+    bump_post_listings(instance.author_id, instance.group_id)
+    search.unindex_post(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    caching.bump(caching.group_listing(instance.slug))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    caching.bump('index', caching.group_listing(instance.slug))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post(instance.post_id, 1)
+    caching.touch(caching.comments_listing(instance.post_id))
+    search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+    caching.touch(caching.comments_listing(instance.post_id))
+    search.unindex_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.user_id, following=1)
+        counters.bump_user(instance.author_id, followers=1)
+        timeline.mark_popular([instance.author_id])
+        timeline.backfill(instance.user, instance.author)
+    caching.bump(caching.follows_listing(instance.user_id))
+    touch_follow_profiles(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.user_id, create=False, following=-1)
+    counters.bump_user(instance.author_id, create=False, followers=-1)
+    timeline.drop(instance.user, instance.author)
+    caching.bump(caching.follows_listing(instance.user_id))
+    touch_follow_profiles(instance)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def user_remember_name(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет только last_login — тогда лишний запрос не нужен.
+    instance._old_card = None
+    if instance.pk is None or (
+        update_fields is not None and not set(update_fields) & set(CARD_FIELDS)
+    ):
+        return
+    instance._old_card = sender.objects.filter(pk=instance.pk).values_list(
+        *CARD_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, **kwargs):
+    # Строка счётчиков заводится сразу, чтобы профиль нового
+    # пользователя не писал в базу при первом просмотре.
+    if created:
+        UserStats.objects.get_or_create(user_id=instance.pk)
+        return
+    old = getattr(instance, '_old_card', None)
+    if old is None or old == tuple(
+        getattr(instance, field) for field in CARD_FIELDS
+    ):
+        return
+    # Карточки кэшируются по updated_at поста: его сдвиг сбрасывает
+    # карточки со старым именем, а bump — страницы лент с ними.
+    posts = Post.objects.filter(author=instance)
+    posts.update(updated_at=timezone.now())
+    bump_post_listings(
+        instance.pk,
+        *posts.order_by().values_list('group_id', flat=True).distinct()
+    )
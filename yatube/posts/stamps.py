@@ -0,0 +1,100 @@
+import hashlib
+
+from django.db.models import Max
+
+from .caching import (
+    author_listing, changed_at, comments_listing, get_version, group_listing
+)
+from .models import Follow, Group, Post, User
+
+
+def _memo(compute):
+    # Штамп — (ETag, Last-Modified) из одного агрегатного запроса.
+    # condition() вызывает функции ETag и Last-Modified по очереди,
+    # а штамп нужен обеим: считаем его один раз на запрос.
+    def stamp(request, **kwargs):
+        if not hasattr(request, '_page_stamp'):
+            request._page_stamp = compute(request, **kwargs)
+        return request._page_stamp
+    return stamp
+
+
+def _etag(request, *parts):
+    viewer = request.user.pk if request.user.is_authenticated else 0
+    # Залогиненным страницы отдают формы с CSRF-токеном: после нового
+    # входа секрет меняется, и старая копия из кэша браузера не годится.
+    csrf = request.META.get('CSRF_COOKIE', '') if viewer else ''
+    raw = '|'.join(
+        map(str, (request.get_full_path(), viewer, csrf) + parts)
+    )
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+@_memo
+def post_stamp(request, post_id):
+    row = Post.objects.filter(pk=post_id).order_by().annotate(
+        last_comment=Max('comments__pub_date')
+    ).values_list(
+        'updated_at', 'last_comment', 'comment_count', 'author__stats__posts',
+        'author_id',
+    ).first()
+    if row is None:
+        return None, None
+    updated_at, last_comment = row[:2]
+    # Удалённый комментарий и новый пост автора (счётчик на странице)
+    # не сдвигают дат в базе, только время изменения их лент.
+    changed = changed_at(comments_listing(post_id), author_listing(row[4]))
+    return _etag(request, *row), max(
+        filter(None, (updated_at, last_comment, changed))
+    )
+
+
+@_memo
+def profile_stamp(request, username):
+    row = User.objects.filter(username=username).annotate(
+        last_post=Max('author__updated_at')
+    ).values_list(
+        'pk', 'last_post',
+        'stats__posts', 'stats__followers', 'stats__following',
+    ).first()
+    if row is None:
+        return None, None
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author_id=row[0]
+    ).exists()
+    changed = changed_at(author_listing(row[0]))
+    return _etag(request, following, *row), max(
+        filter(None, (row[1], changed))
+    )
+
+
+@_memo
+def group_stamp(request, slug):
+    row = Group.objects.filter(slug=slug).annotate(
+        last_post=Max('posts__updated_at')
+    ).values_list('last_post', flat=True)
+    if not row:
+        return None, None
+    listing = group_listing(slug)
+    return _etag(request, get_version(listing)), max(
+        filter(None, (row[0], changed_at(listing)))
+    )
+
+
+def etag(stamp):
+    def func(request, **kwargs):
+        return stamp(request, **kwargs)[0]
+    return func
+
+
+def last_modified(stamp):
+    """Last-Modified только анонимам.
+
+    Ответ залогиненному зависит и от пользователя, а If-Modified-Since
+    этого не учитывает — им хватает ETag.
+    """
+    def func(request, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return stamp(request, **kwargs)[1]
+    return func
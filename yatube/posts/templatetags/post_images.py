@@ -0,0 +1,48 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+from sorl.thumbnail import get_thumbnail
+
+from ..thumbnails import (
+    POST_IMAGE_FRAME, POST_IMAGE_WIDTHS, POST_THUMBNAILS, PlaceholderImage
+)
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_image(image, sizes='100vw', css_class='card-img my-2'):
+    """<img> картинки поста со srcset из вариантов POST_IMAGE_WIDTHS.
+
+    width и height задают пропорции кадра, поэтому браузер резервирует
+    место до загрузки и лента не прыгает. Варианты, которые воркер ещё
+    не сделал, в srcset не попадают; пока нет ни одного — заглушка.
+    """
+    if not image:
+        return ''
+    variants = []
+    for width, (geometry, options) in zip(POST_IMAGE_WIDTHS, POST_THUMBNAILS):
+        thumbnail = get_thumbnail(image, geometry, **options)
+        if not isinstance(thumbnail, PlaceholderImage):
+            variants.append((width, thumbnail.url))
+    width, height = POST_IMAGE_FRAME
+    attrs = {
+        'class': f'{css_class} img-fluid',
+        'src': static('img/placeholder.svg'),
+        'width': width,
+        'height': height,
+        'loading': 'lazy',
+        'decoding': 'async',
+        'alt': '',
+    }
+    if variants:
+        # src — для браузеров без srcset: вариант под ширину кадра.
+        attrs['src'] = min(
+            variants, key=lambda variant: abs(variant[0] - width)
+        )[1]
+        attrs['srcset'] = ', '.join(
+            f'{url} {variant_width}w' for variant_width, url in variants
+        )
+        attrs['sizes'] = sizes
+    return format_html('<img{}>', flatatt(attrs))
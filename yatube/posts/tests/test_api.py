@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.reader = User.objects.create_user(username='Morpheus')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы',
+            slug='Matrix',
+            description='Группа искателей Морфеуса',
+        )
+        for number in range(25):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+        cls.post = Post.objects.create(author=cls.reader, text='Ложки нет')
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Нео ты избранный!'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def test_post_list_cursor(self):
+        """Список постов листается курсором"""
+        response = self.client.get(reverse('api:post_list'))
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(data['results'][0]['text'], 'Ложки нет')
+        response = self.client.get(
+            reverse('api:post_list'), {'after': data['next']}
+        )
+        data = response.json()
+        self.assertEqual(len(data['results']), 6)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['results'][0]['group'], 'Matrix')
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304"""
+        address = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(address)
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEqual(response.json()['author'], 'Morpheus')
+        response = self.client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_related_endpoints(self):
+        """Комментарии, группа, профиль и подписки"""
+        data = self.client.get(reverse(
+            'api:post_comments', kwargs={'post_id': self.post.pk}
+        )).json()
+        self.assertEqual(data['results'][0]['author'], 'Neo')
+        data = self.client.get(reverse(
+            'api:group_detail', kwargs={'slug': 'Matrix'}
+        )).json()
+        self.assertEqual(data['post_count'], 25)
+        data = self.client.get(reverse(
+            'api:group_posts', kwargs={'slug': 'Matrix'}
+        )).json()
+        self.assertEqual(len(data['results']), 20)
+        data = self.client.get(reverse(
+            'api:profile_detail', kwargs={'username': 'Neo'}
+        )).json()
+        self.assertEqual((data['posts'], data['followers']), (25, 1))
+        data = self.client.get(reverse(
+            'api:profile_posts', kwargs={'username': 'Morpheus'}
+        )).json()
+        self.assertEqual(data['results'][0]['text'], 'Ложки нет')
+        data = self.client.get(reverse(
+            'api:profile_following', kwargs={'username': 'Morpheus'}
+        )).json()
+        self.assertEqual(data['results'], ['Neo'])
+
+    def test_read_only(self):
+        """API только читает"""
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы',
+            slug='Matrix',
+            description='Группа искателей Морфеуса',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Белый кролик', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addresses = (
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:profile', kwargs={'username': 'Neo'}),
+            reverse('posts:group_list', kwargs={'slug': 'Matrix'}),
+        )
+
+    def test_not_modified_by_etag(self):
+        """Совпавший ETag даёт 304 без рендера шаблона"""
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertEqual(response.status_code, 200)
+                response = self.client.get(
+                    address, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+
+    def test_not_modified_by_last_modified(self):
+        """Аноним с If-Modified-Since получает 304"""
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                response = self.client.get(
+                    address,
+                    HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_stamps(self):
+        """Новый комментарий и пост меняют штампы"""
+        etags = [self.client.get(address)['ETag']
+                 for address in self.addresses]
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Нео ты избранный!'
+        )
+        Post.objects.create(
+            author=self.user, text='Ложки нет', group=self.group
+        )
+        for address, etag in zip(self.addresses, etags):
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_deletes_move_last_modified(self):
+        """Удаление поста, комментария и отписка сдвигают Last-Modified"""
+        smith = User.objects.create_user(username='Smith')
+        comment = Comment.objects.create(
+            post=self.post, author=smith, text='Мистер Андерсон'
+        )
+        follow = Follow.objects.create(user=smith, author=self.user)
+        doomed = Post.objects.create(
+            author=smith, text='Агент', group=self.group
+        )
+        changes = (
+            (self.addresses[0], comment.delete),
+            (self.addresses[1], follow.delete),
+            (self.addresses[2], doomed.delete),
+        )
+        for address, change in changes:
+            with self.subTest(address=address):
+                since = self.client.get(address)['Last-Modified']
+                later = timezone.now() + timedelta(seconds=5)
+                with mock.patch(
+                    'django.utils.timezone.now', return_value=later
+                ):
+                    change()
+                response = self.client.get(
+                    address, HTTP_IF_MODIFIED_SINCE=since
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_csrf_secret(self):
+        """После смены CSRF-секрета форма комментария не берётся из 304"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        address = self.addresses[0]
+        response = client.get(address)
+        self.assertEqual(response.status_code, 200)
+        # Как при новом входе: login() выдаёт новый секрет
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'a' * 64
+        response = client.get(address, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        token = response.context['csrf_token']
+        response = client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Тук-тук, Нео', 'csrfmiddlewaretoken': str(token)},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_etag_depends_on_viewer(self):
+        """Залогиненный не получает 304 по ETag анонима
+        и не получает Last-Modified"""
+        etag = self.client.get(self.addresses[0])['ETag']
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(self.addresses[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+        response = client.get(
+            self.addresses[0], HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 200)
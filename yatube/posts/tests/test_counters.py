@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from posts.counters import get_stats
+from posts.models import Post, Group, Comment, Follow, UserStats
+
+User = get_user_model()
+
+
+def stats_of(user):
+    return get_stats(User.objects.get(pk=user.pk))
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.reader = User.objects.create_user(username='Morpheus')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы',
+            slug='Matrix',
+            description='Группа искателей Морфеуса',
+        )
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении"""
+        post = Post.objects.create(
+            author=self.user, text='Белый кролик', group=self.group
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Нео ты избранный!'
+        )
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+        self.assertEqual(self.group.post_count, 1)
+        self.assertEqual(stats_of(self.user).posts, 1)
+        self.assertEqual(stats_of(self.user).followers, 1)
+        self.assertEqual(stats_of(self.reader).following, 1)
+
+        comment.delete()
+        follow.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(stats_of(self.user).followers, 0)
+        self.assertEqual(stats_of(self.reader).following, 0)
+
+        post.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+        self.assertEqual(stats_of(self.user).posts, 0)
+
+    def test_group_change_moves_counter(self):
+        """Смена группы поста переносит счётчик"""
+        post = Post.objects.create(
+            author=self.user, text='Белый кролик', group=self.group
+        )
+        post.group = None
+        post.save()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 0)
+
+    def test_user_delete_cascades(self):
+        """Удаление пользователя не ломается на счётчиках"""
+        agent = User.objects.create_user(username='Smith')
+        Post.objects.create(author=agent, text='Мистер Андерсон')
+        Follow.objects.create(user=self.reader, author=agent)
+        agent.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=agent.pk).exists())
+        self.assertEqual(stats_of(self.reader).following, 0)
+
+    def test_reconcile_command(self):
+        """Команда сверки чинит расхождения"""
+        post = Post.objects.create(
+            author=self.user, text='Белый кролик', group=self.group
+        )
+        Post.objects.filter(pk=post.pk).update(comment_count=7)
+        Group.objects.filter(pk=self.group.pk).update(post_count=3)
+        UserStats.objects.filter(user=self.user).update(posts=9)
+        call_command('reconcile_counters', chunk_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+        self.assertEqual(self.group.post_count, 1)
+        self.assertEqual(stats_of(self.user).posts, 1)
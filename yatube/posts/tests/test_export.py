@@ -0,0 +1,75 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from posts.exporter import iter_posts
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы',
+            slug='Matrix',
+            description='Группа искателей Морфеуса',
+        )
+        for number in range(5):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+        Post.objects.create(author=cls.user, text='Без группы')
+
+    def test_iter_posts_windows(self):
+        """Окна по курсору отдают все посты ровно один раз"""
+        rows = list(iter_posts(Post.objects.all(), chunk_size=2))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(len({row[0] for row in rows}), 6)
+        self.assertEqual(rows[0][4], 'Без группы')
+
+    def test_profile_export_csv(self):
+        """Профиль выгружается потоковым CSV"""
+        response = self.client.get(
+            reverse('posts:profile_export', kwargs={'username': 'Neo'})
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[-1]['text'], 'Пост 0')
+        self.assertEqual(rows[-1]['group'], 'Matrix')
+
+    def test_group_export_jsonl(self):
+        """Группа выгружается в JSONL"""
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'Matrix'}),
+            {'format': 'jsonl'}
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['text'] for line in lines],
+            [f'Пост {number}' for number in range(4, -1, -1)]
+        )
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'Matrix'}),
+            {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_command(self):
+        """Команда выгружает посты группы"""
+        out = StringIO()
+        call_command(
+            'export_posts', '--group=Matrix', format='jsonl', chunk_size=2,
+            stdout=out
+        )
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
@@ -0,0 +1,93 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from posts.forms import PostForm
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+# Тег EXIF Orientation: 6 — повернуть на 90° по часовой
+ORIENTATION = 0x0112
+
+
+def upload(name, size=(64, 48), fmt='JPEG', orientation=None):
+    image = Image.new('RGB', size, color=(200, 30, 30))
+    options = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[ORIENTATION] = orientation
+        options['exif'] = exif.tobytes()
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIDE=32)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def submit(self, image):
+        form = PostForm(
+            {'text': 'Фото из Матрицы', 'group': ''}, {'image': image}
+        )
+        if not form.is_valid():
+            return form, None
+        post = form.save(commit=False)
+        post.author = self.user
+        post.save()
+        return form, post
+
+    def test_downscaled_and_stripped(self):
+        """Оригинал уменьшается, поворачивается по EXIF и теряет EXIF"""
+        _, post = self.submit(upload('photo.jpg', orientation=6))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (24, 32))
+            self.assertEqual(stored.format, 'JPEG')
+            self.assertNotIn('exif', stored.info)
+
+    def test_non_web_format_converted(self):
+        """BMP сохраняется как JPEG"""
+        _, post = self.submit(upload('scan.bmp', fmt='BMP'))
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'JPEG')
+
+    @override_settings(IMAGE_UPLOAD_MAX_BYTES=100)
+    def test_large_file_rejected(self):
+        """Слишком большой файл отклоняется"""
+        form, post = self.submit(upload('photo.jpg'))
+        self.assertIsNone(post)
+        self.assertTrue(form.errors['image'][0].startswith('Файл больше'))
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        """Картинка с огромным числом пикселей отклоняется"""
+        form, post = self.submit(upload('photo.png', fmt='PNG'))
+        self.assertIsNone(post)
+        self.assertIn('image', form.errors)
+
+    def test_edit_without_new_image(self):
+        """Правка без нового файла не трогает картинку"""
+        _, post = self.submit(upload('photo.jpg'))
+        form = PostForm(
+            {'text': 'Новый текст', 'group': ''}, instance=post
+        )
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.save().image.name, post.image.name)
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'Новый текст')
@@ -0,0 +1,173 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from posts import search
+from posts.importer import PostImporter
+from posts.models import Follow, Group, Post, ThumbnailTask, TimelineEntry
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.reader = User.objects.create_user(username='Morpheus')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы',
+            slug='Matrix',
+            description='Группа искателей Морфеуса',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            target.write(content)
+        return path
+
+    def test_import_jsonl(self):
+        """JSONL импортируется пачками с производными данными"""
+        rows = [
+            {'author': 'Neo', 'text': 'Красная таблетка', 'group': 'Matrix',
+             'pub_date': '1999-03-31T10:00:00'},
+            {'author': 'Smith', 'text': 'Мистер Андерсон'},
+            {'author': 'Neo', 'text': 'Ложки нет'},
+        ]
+        path = self.write(
+            'posts.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, batch_size=2, stdout=out, stderr=err
+        )
+        self.assertIn('Импортировано 2 постов, пропущено 1', out.getvalue())
+        self.assertIn("строка 2: нет автора 'Smith'", err.getvalue())
+        post = Post.objects.get(text='Красная таблетка')
+        self.assertEqual(post.pub_date.year, 1999)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.post_count, 1)
+        self.assertEqual(User.objects.get(pk=self.user.pk).stats.posts, 2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(
+            [post_id for post_id, _ in search.ranked('ложки')],
+            [Post.objects.get(text='Ложки нет').pk]
+        )
+
+    def test_import_jsonl_skips_non_objects(self):
+        """JSON-строка не объект пропускается, импорт продолжается"""
+        path = self.write('posts.jsonl', '\n'.join((
+            '[1, 2]',
+            '"Нео"',
+            json.dumps({'author': 'Neo', 'text': 'Ложки нет'}),
+        )))
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err)
+        self.assertIn('Импортировано 1 постов, пропущено 2', out.getvalue())
+        self.assertIn('строка 1: строка должна быть JSON-объектом',
+                      err.getvalue())
+        self.assertTrue(Post.objects.filter(text='Ложки нет').exists())
+
+    def test_import_csv_with_images(self):
+        """CSV импортируется с картинками из каталога"""
+        shutil.copy(
+            os.path.join(settings.BASE_DIR, 'static', 'img', 'logo.png'),
+            os.path.join(self.workdir, 'logo.png')
+        )
+        path = self.write(
+            'posts.csv',
+            'author,text,group,image\n'
+            'Neo,Белый кролик,,logo.png\n'
+        )
+        call_command(
+            'import_posts', path, images=self.workdir, stdout=StringIO()
+        )
+        post = Post.objects.get(text='Белый кролик')
+        self.assertTrue(post.image.name.startswith('posts/logo'))
+        self.assertTrue(
+            ThumbnailTask.objects.filter(image=post.image.name).exists()
+        )
+
+    def stored_images(self):
+        if not default_storage.exists('posts'):
+            return set()
+        return set(default_storage.listdir('posts')[1])
+
+    def test_import_normalizes_images(self):
+        """Картинки нормализуются, как при загрузке через форму"""
+        Image.new('RGB', (3000, 1500), 'red').save(
+            os.path.join(self.workdir, 'matrix.bmp')
+        )
+        self.write('broken.png', 'не картинка')
+        path = self.write(
+            'posts.csv',
+            'author,text,group,image\n'
+            'Neo,Красный экран,,matrix.bmp\n'
+            'Neo,Битый файл,,broken.png\n'
+        )
+        err = StringIO()
+        call_command(
+            'import_posts', path, images=self.workdir,
+            stdout=StringIO(), stderr=err
+        )
+        self.assertIn('строка 3: не картинка broken.png', err.getvalue())
+        post = Post.objects.get(text='Красный экран')
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (settings.IMAGE_MAX_SIDE, 1024))
+
+    def test_failed_batch_removes_images(self):
+        """Картинки откатившейся пачки удаляются из хранилища"""
+        shutil.copy(
+            os.path.join(settings.BASE_DIR, 'static', 'img', 'logo.png'),
+            os.path.join(self.workdir, 'logo.png')
+        )
+        before = self.stored_images()
+        importer = PostImporter(images_dir=self.workdir)
+        with mock.patch.object(
+            PostImporter, '_derive', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                importer.run([
+                    (2, {'author': 'Neo', 'text': 'Тук-тук',
+                         'image': 'logo.png'}),
+                ])
+        self.assertFalse(Post.objects.filter(text='Тук-тук').exists())
+        self.assertEqual(self.stored_images(), before)
+
+    def test_import_reports_bad_encoding(self):
+        """Файл не в UTF-8 — ошибка строки, а не падение команды"""
+        path = os.path.join(self.workdir, 'posts.jsonl')
+        with open(path, 'wb') as target:
+            target.write(json.dumps(
+                {'author': 'Neo', 'text': 'Ложки нет'}, ensure_ascii=False
+            ).encode('cp1251'))
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err)
+        self.assertIn('Импортировано 0 постов, пропущено 1', out.getvalue())
+        self.assertIn('строка 1: файл не в UTF-8', err.getvalue())
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from posts.models import Post
+from posts.paginator import (
+    CachedCountPaginator, CursorPaginator, decode_cursor, encode_cursor
+)
+
+User = get_user_model()
+
+POSTS_LIMIT: int = 10
+POSTS_TOTAL: int = 25
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(POSTS_TOTAL)
+        )
+        cls.ordered = list(
+            Post.objects.order_by('-pub_date', '-pk')
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_cursor_roundtrip(self):
+        """Токен курсора восстанавливает (pub_date, id)"""
+        post = self.ordered[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)),
+            (post.pub_date, post.pk)
+        )
+        self.assertIsNone(decode_cursor('мусор'))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_walk_forward_and_back(self):
+        """Курсоры обходят всю ленту без пропусков и повторов"""
+        seen = []
+        paginator = CursorPaginator(Post.objects.all(), POSTS_LIMIT)
+        page = paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(page.object_list)
+            if not page.has_next():
+                break
+            paginator = CursorPaginator(
+                Post.objects.all(), POSTS_LIMIT,
+                after=paginator.next_cursor
+            )
+            page = paginator.get_page()
+        self.assertEqual(seen, self.ordered)
+
+        paginator = CursorPaginator(
+            Post.objects.all(), POSTS_LIMIT,
+            before=paginator.previous_cursor
+        )
+        page = paginator.get_page()
+        self.assertEqual(
+            list(page.object_list),
+            self.ordered[POSTS_LIMIT:POSTS_LIMIT * 2]
+        )
+
+    def test_index_uses_cursor(self):
+        """Главная отдаёт следующую страницу по ?after="""
+        response = self.guest_client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), self.ordered[:POSTS_LIMIT])
+        response = self.guest_client.get(
+            reverse('posts:index'),
+            {'after': page_obj.paginator.next_cursor}
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.ordered[POSTS_LIMIT:POSTS_LIMIT * 2]
+        )
+
+
+class CachedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {i}')
+            for i in range(POSTS_TOTAL)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_cached(self):
+        """COUNT(*) считается один раз и берётся из кэша"""
+        queryset = Post.objects.filter(author=self.user)
+        self.assertEqual(
+            CachedCountPaginator(queryset, POSTS_LIMIT).count, POSTS_TOTAL
+        )
+        Post.objects.filter(pk=Post.objects.first().pk).delete()
+        with self.assertNumQueries(0):
+            paginator = CachedCountPaginator(queryset, POSTS_LIMIT)
+            self.assertEqual(paginator.num_pages, 3)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=10)
+    def test_count_estimated(self):
+        """Большая таблица без фильтров оценивается по pk"""
+        Post.objects.filter(pk=Post.objects.first().pk).delete()
+        last = Post.objects.order_by('-pk').first().pk
+        paginator = CachedCountPaginator(Post.objects.all(), POSTS_LIMIT)
+        self.assertEqual(paginator.count, last)
+        paginator = CachedCountPaginator(
+            Post.objects.filter(author=self.user), POSTS_LIMIT
+        )
+        self.assertEqual(paginator.count, POSTS_TOTAL - 1)
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class QueryPlanTests(TestCase):
+    def test_feeds_use_indexes(self):
+        """Ленты читаются по индексам без временной сортировки"""
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('FAIL', out.getvalue())
+        self.assertIn('post_author_date_idx', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.author = User.objects.create_user(username='Morpheus')
+        cls.group = Group.objects.create(
+            title='Исследователи Матрицы', slug='Matrix', description='-'
+        )
+        for number in range(3):
+            post = Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Следуй за белым кроликом {number}',
+                image=SimpleUploadedFile(f'rabbit{number}.gif', SMALL_GIF),
+            )
+            Comment.objects.create(post=post, author=cls.user, text='Да')
+        cls.post = post
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_logged_in_cold_cache_within_budget(self):
+        """Вьюхи укладываются в бюджет для пользователя на пустом кэше
+
+        Сверх запросов самой страницы: сессия, пользователь, чтение
+        хранилища миниатюр и постановка задания воркеру.
+        """
+        self.client.force_login(self.user)
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:search') + '?q=кроликом',
+            reverse('posts:group_posts'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:post_comments', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+            reverse('posts:group_export', args=[self.group.slug]),
+            reverse('posts:profile_export', args=[self.author.username]),
+            reverse('about:author'),
+            reverse('about:tech'),
+            reverse('users:login'),
+            reverse('users:signup'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+        cache.clear()
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]), {'text': 'Да'}
+        )
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,102 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from posts import search
+from posts.models import Post, Comment, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+        cls.rabbit = Post.objects.create(
+            author=cls.user, text='Нужно следовать за белым кроликом'
+        )
+        cls.spoon = Post.objects.create(
+            author=cls.user, text='Ложки нет, кроликом быть не обязательно'
+        )
+        cls.pill = Post.objects.create(
+            author=cls.user, text='Красная таблетка'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query, **params):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return response.context['page_obj']
+
+    def check_search(self):
+        self.assertEqual(
+            set(self.found('КРОЛИКОМ')), {self.rabbit, self.spoon}
+        )
+        self.assertEqual(list(self.found('белым кроликом')), [self.rabbit])
+        self.assertEqual(len(self.found('матрица')), 0)
+
+        Comment.objects.create(
+            post=self.pill, author=self.user, text='А кроликом не пахнет'
+        )
+        self.assertIn(self.pill, list(self.found('кроликом')))
+
+        Post.objects.get(pk=self.spoon.pk).delete()
+        self.assertEqual(len(self.found('ложки')), 0)
+
+    def test_search_fts(self):
+        """Поиск через FTS5 находит посты и комментарии"""
+        self.assertTrue(search.fts_available())
+        self.check_search()
+
+    def test_search_inverted_index(self):
+        """Поиск без FTS5 идёт по таблице SearchTerm"""
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            call_command('rebuild_search_index', stdout=StringIO())
+            self.assertTrue(SearchTerm.objects.exists())
+            self.check_search()
+
+    def admin_found(self, query):
+        admin = User.objects.create_superuser(
+            username='Morpheus', email='m@example.com', password='-'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': query}
+        )
+        return set(response.context['cl'].result_list)
+
+    def test_admin_search(self):
+        """Поиск в админке — подзапросом к индексу и только по постам"""
+        Comment.objects.create(
+            post=self.pill, author=self.user, text='А кроликом не пахнет'
+        )
+        self.assertEqual(
+            self.admin_found('кроликом'), {self.rabbit, self.spoon}
+        )
+        with mock.patch.object(search, 'fts_available', return_value=False):
+            call_command('rebuild_search_index', stdout=StringIO())
+            self.assertEqual(
+                search.matching_posts(Post.objects.all(), 'белым КРОЛИКОМ')
+                .get(), self.rabbit
+            )
+            self.assertFalse(
+                search.matching_posts(Post.objects.all(), 'пахнет').exists()
+            )
+
+    def test_search_keyset_paging(self):
+        """Выдача листается курсором без повторов"""
+        for i in range(12):
+            Post.objects.create(author=self.user, text=f'Агент Смит {i}')
+        first = self.found('агент')
+        self.assertTrue(first.has_next())
+        second = self.found('агент', after=first.paginator.next_cursor)
+        self.assertEqual(len(first) + len(second), 12)
+        self.assertFalse(set(first) & set(second))
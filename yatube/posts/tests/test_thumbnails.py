@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from posts.models import Post, ThumbnailTask
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeferredThumbnailTests(TestCase):
+    small_gif = (
+        b'\x47\x49\x46\x38\x39\x61\x02\x00'
+        b'\x01\x00\x80\x00\x00\x00\x00\x00'
+        b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+        b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+        b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+        b'\x0A\x00\x3B'
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Neo')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_author = Client()
+        self.authorized_author.force_login(self.user)
+
+    def test_thumbnail_generated_by_worker(self):
+        """Миниатюра делается воркером, до этого — заглушка"""
+        uploaded = SimpleUploadedFile(
+            name='rabbit.gif',
+            content=self.small_gif,
+            content_type='image/gif'
+        )
+        self.authorized_author.post(
+            reverse('posts:post_create'),
+            data={'text': 'Белый кролик', 'image': uploaded},
+            follow=True
+        )
+        post = Post.objects.get(text='Белый кролик')
+        self.assertTrue(
+            ThumbnailTask.objects.filter(image=post.image.name).exists()
+        )
+        address = reverse('posts:profile', kwargs={'username': 'Neo'})
+        response = self.authorized_author.get(address)
+        self.assertContains(response, 'img/placeholder.svg')
+
+        call_command('process_thumbnails', once=True, stdout=StringIO())
+        self.assertFalse(ThumbnailTask.objects.exists())
+        response = self.authorized_author.get(address)
+        self.assertNotContains(response, 'img/placeholder.svg')
+        self.assertContains(response, f'{settings.MEDIA_URL}cache/')
+
+    def test_post_image_srcset(self):
+        """Тег картинки поста отдаёт srcset, размеры и ленивую загрузку"""
+        post = Post.objects.create(
+            author=self.user, text='Ложки нет',
+            image=SimpleUploadedFile('spoon.gif', self.small_gif)
+        )
+        tag = Template('{% load post_images %}{% post_image image %}')
+        html = tag.render(Context({'image': post.image}))
+        self.assertIn('img/placeholder.svg', html)
+        self.assertIn('width="960"', html)
+        self.assertIn('height="339"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertNotIn('srcset', html)
+
+        call_command('process_thumbnails', once=True, stdout=StringIO())
+        html = tag.render(Context({'image': post.image}))
+        self.assertNotIn('img/placeholder.svg', html)
+        for width in (320, 640, 960, 1920):
+            self.assertIn(f' {width}w', html)
+        self.assertIn('sizes="100vw"', html)
@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import timeline
+from posts.models import Post, Follow, TimelineEntry, UserStats
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Neo')
+        cls.reader = User.objects.create_user(username='Morpheus')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Нужно следовать за белым кроликом',
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self, **params):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), params
+        )
+        return response.context['page_obj']
+
+    def test_follow_backfills_and_unfollow_drops(self):
+        """Подписка заполняет ленту, отписка очищает"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, post=self.post
+            ).exists()
+        )
+        self.assertIn(self.post, list(self.feed()))
+        follow.delete()
+        self.assertFalse(self.reader.timeline.exists())
+        self.assertEqual(len(self.feed()), 0)
+
+    def test_new_post_fans_out(self):
+        """Новый пост попадает в ленты подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Ложки нет')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed()[0], post)
+
+    @override_settings(TIMELINE_LENGTH=3)
+    def test_timeline_is_trimmed(self):
+        """Лента обрезается, глубокие страницы читаются напрямую"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(5):
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+        self.assertEqual(self.reader.timeline.count(), 3)
+        page_obj = self.feed()
+        self.assertEqual(len(page_obj), 3)
+        self.assertTrue(page_obj.has_next())
+        older = self.feed(after=page_obj.paginator.next_cursor)
+        self.assertEqual(len(older), 3)
+        self.assertFalse(older.has_next())
+        self.assertEqual(
+            list(page_obj) + list(older),
+            list(Post.objects.order_by('-pub_date', '-pk'))
+        )
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_fan_out_trims_all_timelines_at_once(self):
+        """Ленты подписчиков обрезаются одним запросом, а не по одному"""
+        readers = [self.reader] + [
+            User.objects.create_user(username=f'Agent{i}') for i in range(5)
+        ]
+        for reader in readers:
+            Follow.objects.create(user=reader, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(2)
+        ]
+        with CaptureQueriesContext(connection) as captured:
+            timeline.fan_out(posts[-1])
+        self.assertLessEqual(len(captured), 4)
+        for reader in readers:
+            self.assertEqual(
+                list(reader.timeline.values_list('post', flat=True)),
+                [post.pk for post in reversed(posts)]
+            )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_is_pulled(self):
+        """Посты популярного автора подмешиваются при чтении"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Ложки нет')
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, list(self.feed()))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_merged_across_pages(self):
+        """Посты популярного автора сливаются с лентой на всех страницах"""
+        trinity = User.objects.create_user(username='Trinity')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=trinity)
+        Follow.objects.create(user=trinity, author=self.author)
+        for i in range(7):
+            Post.objects.create(author=self.author, text=f'Нео {i}')
+            Post.objects.create(author=trinity, text=f'Тринити {i}')
+        page_obj = self.feed()
+        older = self.feed(after=page_obj.paginator.next_cursor)
+        self.assertFalse(older.has_next())
+        newer = self.feed(before=older.paginator.previous_cursor)
+        self.assertEqual(list(newer), list(page_obj))
+        self.assertEqual(
+            list(page_obj) + list(older),
+            list(Post.objects.order_by('-pub_date', '-pk'))
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_unfollow_does_not_refan_popular_author(self):
+        """Отписка от популярного автора не раздаёт его посты заново"""
+        trinity = User.objects.create_user(username='Trinity')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=trinity, author=self.author)
+        self.assertTrue(UserStats.objects.get(user=self.author).pulled)
+        follow.delete()
+        post = Post.objects.create(author=self.author, text='Ложки нет')
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, list(self.feed()))
@@ -6,7 +6,7 @@ from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
 from http import HTTPStatus
-from posts.models import Post, Group, Comment
+from posts.models import Post, Group, Comment, Follow
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
 from django.core.cache import cache
@@ -280,21 +280,101 @@ class PostPagesTests(TestCase):
         response_1 = self.authorized_author.get('/')
         Page_1 = response_1.content
 
-        post = Post.objects.get(pk=f'{self.post.id}')
-        post.delete()
+        Post.objects.filter(pk=self.post.id).update(text='Изменено в обход')
 
         response_2 = self.authorized_author.get('/')
         Page_2 = response_2.content
 
         self.assertEqual(Page_1, Page_2)
 
-        cache.clear()
+        post = Post.objects.get(pk=f'{self.post.id}')
+        post.delete()
 
         response_3 = self.authorized_author.get('/')
         Page_3 = response_3.content
 
         self.assertNotEqual(Page_1, Page_3)
 
+    def test_cache_in_group_list(self):
+        """Кэш группы сбрасывается новым постом группы"""
+        address = reverse(
+            'posts:group_list', kwargs={'slug': f'{self.group.slug}'}
+        )
+        response_1 = self.guest_client.get(address)
+        Post.objects.create(
+            author=self.user,
+            text='Я выпил красную таблетку',
+            group=self.group
+        )
+        response_2 = self.guest_client.get(address)
+        self.assertNotEqual(response_1.content, response_2.content)
+        self.assertContains(response_2, 'Я выпил красную таблетку')
+
+    def test_cached_listing_not_shared_with_guest(self):
+        """Гость не получает из кэша страницу с шапкой пользователя"""
+        cache.clear()
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                self.authorized_client.get(address)
+                response = self.guest_client.get(address)
+                self.assertNotContains(response, self.user_authorized.username)
+                self.assertNotContains(response, reverse('users:logout'))
+                self.assertContains(response, reverse('users:login'))
+
+    def test_cache_in_follow_index(self):
+        """Лента подписок кэшируется для читателя и сбрасывается
+        постом автора и подпиской"""
+        cache.clear()
+        address = reverse('posts:follow_index')
+        Follow.objects.create(user=self.user_authorized, author=self.user)
+        response_1 = self.authorized_client.get(address)
+        Post.objects.filter(pk=self.post.id).update(text='Изменено в обход')
+        response_2 = self.authorized_client.get(address)
+        self.assertEqual(response_1.content, response_2.content)
+
+        Post.objects.create(author=self.user, text='Пост автора')
+        response_3 = self.authorized_client.get(address)
+        self.assertContains(response_3, 'Пост автора')
+
+        smith = User.objects.create_user(username='Smith')
+        Post.objects.create(author=smith, text='Мистер Андерсон')
+        response_4 = self.authorized_client.get(address)
+        self.assertNotContains(response_4, 'Мистер Андерсон')
+        Follow.objects.create(user=self.user_authorized, author=smith)
+        response_5 = self.authorized_client.get(address)
+        self.assertContains(response_5, 'Мистер Андерсон')
+
+    def test_post_card_fragment_cache(self):
+        """Карточка поста кэшируется до изменения поста"""
+        address = reverse(
+            'posts:profile',
+            kwargs={'username': f'{PostPagesTests.user.username}'}
+        )
+        self.guest_client.get(address)
+        Post.objects.filter(pk=self.post.id).update(text='Изменено в обход')
+        response = self.guest_client.get(address)
+        self.assertNotContains(response, 'Изменено в обход')
+
+        post = Post.objects.get(pk=self.post.id)
+        post.text = 'Красная таблетка'
+        post.save()
+        response = self.guest_client.get(address)
+        self.assertContains(response, 'Красная таблетка')
+
+    def test_post_card_shows_renamed_author(self):
+        """После смены имени автора карточки и ленты показывают новое"""
+        address = reverse('posts:index')
+        self.guest_client.get(address)
+        author = User.objects.get(pk=PostPagesTests.user.pk)
+        author.first_name, author.last_name = 'Томас', 'Андерсон'
+        author.save()
+        response = self.guest_client.get(address)
+        self.assertContains(response, 'Томас Андерсон')
+
     def test_create_comment(self):
         """Проверка создания коментария"""
         post = Post.objects.get(pk=PostPagesTests.post.id)
@@ -383,3 +463,49 @@ class PostPagesTests(TestCase):
             )
         )
         self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Trinity')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Нужно следовать за белым кроликом',
+        )
+        for number in range(25):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def test_comments_paginated(self):
+        """На странице поста только свежие комментарии, остальные
+        подгружаются по курсору фрагментом или JSON"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 20)
+        self.assertEqual(comments[0].text, 'Комментарий 24')
+        cursor = comments.paginator.next_cursor
+        self.assertIsNotNone(cursor)
+        address = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk}
+        )
+        self.assertContains(response, f'{address}?after={cursor}')
+
+        response = self.client.get(address, {'after': cursor})
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertNotContains(response, 'Показать ещё')
+
+        response = self.client.get(
+            address, {'after': cursor, 'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            [f'Комментарий {number}' for number in range(4, -1, -1)]
+        )
+        self.assertIsNone(data['next'])
@@ -0,0 +1,199 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.templatetags.static import static
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.helpers import deserialize, serialize
+from sorl.thumbnail.images import DummyImageFile, ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from .models import Post, ThumbnailTask
+
+# Ширины вариантов картинки поста для srcset и пропорции кадра
+POST_IMAGE_WIDTHS = (320, 640, 960, 1920)
+POST_IMAGE_FRAME = (960, 339)
+
+
+def post_geometry(width):
+    frame_width, frame_height = POST_IMAGE_FRAME
+    return f'{width}x{round(width * frame_height / frame_width)}'
+
+
+# Геометрии, которые используют шаблоны: (геометрия, опции {% thumbnail %})
+POST_THUMBNAILS = tuple(
+    (post_geometry(width), {'crop': 'center', 'upscale': True})
+    for width in POST_IMAGE_WIDTHS
+)
+# Сколько помнить, что миниатюра уже в очереди: без метки каждая
+# отрисовка заглушки ходила бы в базу. По истечении задание ставится заново.
+PENDING_TIMEOUT = 60 * 60
+
+
+def pending_key(thumbnail):
+    return f'thumbnail-pending:{thumbnail.name}'
+
+
+class PlaceholderImage(DummyImageFile):
+    """Заглушка нужного размера, пока воркер не сделал миниатюру."""
+
+    @property
+    def url(self):
+        return static('img/placeholder.svg')
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не генерирует миниатюры во время запроса.
+
+    Готовая миниатюра берётся из key-value хранилища sorl. Если её нет,
+    ставится задание воркеру (`manage.py process_thumbnails`) и отдаётся
+    заглушка. Воркер вызывает бэкенд с `generate=True`.
+    """
+
+    def _thumbnail_for(self, source, geometry_string, options):
+        # Повторяет нормализацию опций из ThumbnailBackend.get_thumbnail,
+        # чтобы имя файла совпало с тем, что создаст воркер.
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        generate = options.pop('generate', False)
+        if generate or not settings.THUMBNAIL_DEFERRED or not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        thumbnail = self._thumbnail_for(source, geometry_string, options)
+        if cache.get(pending_key(thumbnail)):
+            return PlaceholderImage(geometry_string)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        enqueue(source.name, [(geometry_string, options)])
+        return PlaceholderImage(geometry_string)
+
+    def is_ready(self, file_, geometry_string, **options):
+        thumbnail = self._thumbnail_for(
+            ImageFile(file_), geometry_string, options
+        )
+        return default.kvstore.get(thumbnail) is not None
+
+
+def _enqueue(items):
+    backend = default.backend
+    ThumbnailTask.objects.bulk_create(
+        [
+            ThumbnailTask(
+                image=image_name,
+                geometry=geometry,
+                options=serialize(options),
+            )
+            for image_name, geometry, options in items
+        ],
+        ignore_conflicts=True,
+    )
+    cache.set_many({
+        pending_key(
+            backend._thumbnail_for(ImageFile(image_name), geometry, options)
+        ): True
+        for image_name, geometry, options in items
+    }, PENDING_TIMEOUT)
+
+
+def enqueue(image_name, geometries=POST_THUMBNAILS):
+    """Ставит в очередь генерацию миниатюр файла."""
+    _enqueue([
+        (image_name, geometry, options) for geometry, options in geometries
+    ])
+
+
+def enqueue_images(image_names, geometries=POST_THUMBNAILS):
+    """Ставит в очередь миниатюры пачки файлов одним запросом."""
+    _enqueue([
+        (image_name, geometry, options)
+        for image_name in image_names
+        for geometry, options in geometries
+    ])
+
+
+def enqueue_post(post):
+    if post.image:
+        enqueue(post.image.name)
+
+
+def prefetch(posts, geometries=POST_THUMBNAILS):
+    """Готовит миниатюры страницы постов пачкой.
+
+    Без этого каждая карточка с новой картинкой делала бы свой запрос
+    в хранилище sorl и свою вставку задания.
+    """
+    kvstore = default.kvstore
+    if not settings.THUMBNAIL_DEFERRED or not isinstance(kvstore, KVStore):
+        return
+    backend = default.backend
+    wanted = {}
+    for image_name in {post.image.name for post in posts if post.image}:
+        for geometry, options in geometries:
+            thumbnail = backend._thumbnail_for(
+                ImageFile(image_name), geometry, options
+            )
+            wanted[add_prefix(thumbnail.key)] = (
+                pending_key(thumbnail), (image_name, geometry, options)
+            )
+    known = kvstore.cache.get_many(list(wanted))
+    pending = cache.get_many([mark for mark, _ in wanted.values()])
+    unknown = [
+        key for key, (mark, _) in wanted.items()
+        if key not in known and mark not in pending
+    ]
+    stored = {}
+    if unknown:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=unknown).values_list(
+                'key', 'value'
+            )
+        )
+        kvstore.cache.set_many({
+            key: stored.get(key, EMPTY_VALUE) for key in unknown
+        }, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+    queued = [
+        item for key, (mark, item) in wanted.items()
+        if mark not in pending and key not in stored
+        and known.get(key, EMPTY_VALUE) == EMPTY_VALUE
+    ]
+    if queued:
+        _enqueue(queued)
+
+
+def process(task):
+    """Генерирует миниатюру задания; возвращает True при успехе."""
+    options = deserialize(task.options)
+    backend = default.backend
+    backend.get_thumbnail(
+        task.image, task.geometry, generate=True, **options
+    )
+    if not backend.is_ready(task.image, task.geometry, **options):
+        ThumbnailTask.objects.filter(pk=task.pk).update(failed=True)
+        return False
+    task.delete()
+    cache.delete(pending_key(
+        backend._thumbnail_for(ImageFile(task.image), task.geometry, options)
+    ))
+    if ThumbnailTask.objects.filter(image=task.image, failed=False).exists():
+        return True
+    # Когда готовы все варианты, сохранение меняет updated_at и сбрасывает
+    # кэш карточек и лент, где до этого стояла заглушка.
+    for post in Post.objects.filter(image=task.image):
+        post.save(update_fields=['updated_at'])
+    return True
@@ -0,0 +1,216 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import cached_property
+
+from .caching import author_listing, follows_listing
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginator import CursorPaginator, decode_cursor, get_cursor_page
+
+
+# Сколько лент обрезать одним запросом (лимит параметров SQLite — 999)
+TRIM_CHUNK = 500
+
+
+def popular_author_ids(user):
+    """Авторы из подписок пользователя, посты которых не раздаются."""
+    return list(
+        Follow.objects.filter(
+            user=user, author__stats__pulled=True
+        ).values_list('author_id', flat=True)
+    )
+
+
+def mark_popular(author_ids=None):
+    """Переводит авторов с подписчиками сверх лимита на чтение.
+
+    Флаг не снимается: иначе отписка одного читателя заново
+    раскладывала бы посты автора по лентам всех остальных.
+    """
+    stats = UserStats.objects.filter(
+        pulled=False, followers__gt=settings.TIMELINE_FANOUT_LIMIT
+    )
+    if author_ids is not None:
+        stats = stats.filter(user_id__in=author_ids)
+    stats.update(pulled=True)
+
+
+def _trim(where, params):
+    # Одним DELETE для всех лент: записи нумеруются внутри ленты в порядке
+    # индекса (user, -pub_date, -post), удаляется всё за TIMELINE_LENGTH.
+    table = TimelineEntry._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+            f'PARTITION BY user_id ORDER BY pub_date DESC, post_id DESC'
+            f') AS position FROM {table} WHERE {where}'
+            f') WHERE position > %s)',
+            [*params, settings.TIMELINE_LENGTH]
+        )
+
+
+def trim(user_ids):
+    """Обрезает ленты пользователей до TIMELINE_LENGTH записей."""
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), TRIM_CHUNK):
+        chunk = user_ids[start:start + TRIM_CHUNK]
+        _trim(
+            'user_id IN ({})'.format(', '.join(['%s'] * len(chunk))), chunk
+        )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )[:settings.TIMELINE_FANOUT_LIMIT + 1]
+    )
+    if len(followers) > settings.TIMELINE_FANOUT_LIMIT:
+        mark_popular([post.author_id])
+    if not followers or len(followers) > settings.TIMELINE_FANOUT_LIMIT or (
+        UserStats.objects.filter(user_id=post.author_id, pulled=True).exists()
+    ):
+        # Популярного автора читатели подтягивают сами при чтении.
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        ignore_conflicts=True,
+    )
+    _trim(
+        f'user_id IN (SELECT user_id FROM {Follow._meta.db_table} '
+        'WHERE author_id = %s)',
+        [post.author_id]
+    )
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов (импорт) по лентам подписчиков."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    mark_popular(list(by_author))
+    follows = Follow.objects.filter(author_id__in=by_author).exclude(
+        author__stats__pulled=True
+    ).values_list('user_id', 'author_id')
+    readers = set()
+    for user_id, author_id in follows.iterator():
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id, post_id=post.pk, pub_date=post.pub_date
+                )
+                for post in by_author[author_id]
+            ],
+            ignore_conflicts=True,
+        )
+        readers.add(user_id)
+    trim(readers)
+
+
+def backfill(user, author):
+    """Добавляет в ленту пользователя свежие посты нового автора."""
+    posts = Post.objects.filter(author=author).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+    trim([user.pk])
+
+
+def drop(user, author):
+    """Убирает из ленты пользователя посты автора после отписки."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def beyond_timeline(user, cursor):
+    """Курсор старше самой старой записи ленты (лента обрезана)."""
+    oldest = TimelineEntry.objects.filter(user=user).order_by(
+        'pub_date'
+    ).values_list('pub_date', flat=True).first()
+    return oldest is None or cursor[0] <= oldest
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок из материализованных записей пользователя.
+
+    Записи читаются по индексу (user, -pub_date, -post) не дальше одной
+    страницы, посты — через select_related. Посты популярных авторов
+    выбираются так же, по автору, и сливаются со страницей в памяти.
+    """
+
+    def __init__(self, user, per_page, after=None, before=None):
+        super().__init__(
+            TimelineEntry.objects.filter(user=user).select_related(
+                'post__author', 'post__group'
+            ),
+            per_page, after=after, before=before,
+        )
+        self.user = user
+
+    def _rows(self, limit):
+        entries = self._slice(self.object_list, limit, key='post_id')
+        posts = {entry.post_id: entry.post for entry in entries}
+        if len(entries) < limit and not self.before:
+            # Записи кончились; если лента обрезана, старые посты
+            # подписок есть дальше — их отдаёт запрос через подписки.
+            self.open_ended = TimelineEntry.objects.filter(
+                user=self.user
+            )[settings.TIMELINE_LENGTH - 1:].exists()
+        for author_id in self.popular:
+            author_posts = Post.objects.select_related(
+                'author', 'group'
+            ).filter(author_id=author_id)
+            for post in self._slice(author_posts, limit):
+                posts.setdefault(post.pk, post)
+        rows = sorted(
+            posts.values(),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=not self.before,
+        )
+        return rows[:limit]
+
+    @cached_property
+    def popular(self):
+        return popular_author_ids(self.user)
+
+
+def follow_feed_listings(user):
+    """Источники ленты подписок: сами подписки и каждый автор."""
+    author_ids = Follow.objects.filter(user=user).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True)
+    return [follows_listing(user.pk)] + [
+        author_listing(author_id) for author_id in author_ids
+    ]
+
+
+def get_timeline_page(request, per_page):
+    """Страница ленты подписок текущего пользователя.
+
+    Страницы глубже обрезанной ленты отдаются запросом через подписки.
+    """
+    after = request.GET.get('after')
+    cursor = decode_cursor(after)
+    if cursor is not None and beyond_timeline(request.user, cursor):
+        return get_cursor_page(
+            request,
+            Post.objects.select_related('author', 'group').filter(
+                author__following__user=request.user
+            ),
+            per_page,
+        )
+    return TimelinePaginator(
+        request.user, per_page, after=after,
+        before=request.GET.get('before'),
+    ).get_page()
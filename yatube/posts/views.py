@@ -1,28 +1,61 @@
 
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from .models import Post, Group, User, Follow
 from .forms import PostForm, CommentForm
+from .api import comment_data
+from .caching import cache_listing, cache_user_listing, group_listing
+from .counters import get_stats
+from .exporter import CONTENT_TYPES, export
+from .paginator import CursorPaginator, get_cursor_page
+from .search import SearchPaginator
+from .stamps import (
+    etag, group_stamp, last_modified, post_stamp, profile_stamp
+)
+from .thumbnails import prefetch as prefetch_thumbnails
+from .timeline import follow_feed_listings, get_timeline_page
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+from core.queries import query_budget
+from core.routers import read_only_view
 
 posts_limit: int = 10
+comments_limit: int = 20
 
 
-@cache_page(20, key_prefix="index_page")
+@query_budget(6)
+@read_only_view
+@cache_listing('index')
 def index(request):
     """Функция выводит информаницю на станицу index.html."""
-    post_list = Post.objects.select_related('author').all()
+    post_list = Post.objects.select_related('author', 'group').all()
     template = 'posts/index.html'
-    paginator = Paginator(post_list, posts_limit)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_cursor_page(request, post_list, posts_limit)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@query_budget(7)
+def search(request):
+    """Полнотекстовый поиск по постам и комментариям."""
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(
+        query, posts_limit, after=request.GET.get('after')
+    )
+    page_obj = paginator.get_page()
+    prefetch_thumbnails(page_obj)
+    template = 'posts/search.html'
+    context = {
+        'q': query,
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
+
+
+@query_budget(2)
 def group_posts(request):
     """Функция выводит информаницю на станицу group.html."""
     template = 'posts/group.html'
@@ -31,14 +64,17 @@ def group_posts(request):
     return render(request, template, context)
 
 
+@query_budget(8)
+@read_only_view
+@condition(etag(group_stamp), last_modified(group_stamp))
+@cache_listing(group_listing)
 def group_posts_list(request, slug):
     """Функция выводит информаницю на станицу group_list.html."""
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
     template = 'posts/group_list.html'
-    paginator = Paginator(post_list, posts_limit)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_cursor_page(request, post_list, posts_limit)
+    prefetch_thumbnails(page_obj)
     context = {
         'slug': slug,
         'group': group,
@@ -47,14 +83,46 @@ def group_posts_list(request, slug):
     return render(request, template, context)
 
 
-def profile(request, username):
+def export_response(request, queryset, filename):
+    """Потоковая выгрузка постов в CSV (по умолчанию) или JSONL."""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in CONTENT_TYPES:
+        raise Http404('Неизвестный формат выгрузки')
+    response = StreamingHttpResponse(
+        export(queryset, fmt), content_type=CONTENT_TYPES[fmt]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"'
+    )
+    return response
+
+
+@query_budget(3)
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(request, group.posts.all(), f'group-{slug}')
+
+
+@query_budget(3)
+def profile_export(request, username):
     author = get_object_or_404(User, username=username)
+    return export_response(
+        request, author.author.all(), f'profile-{username}'
+    )
+
+
+@query_budget(10)
+@read_only_view
+@condition(etag(profile_stamp), last_modified(profile_stamp))
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     post_list = author.author.select_related(
-        'author')
+        'author', 'group')
     template = 'posts/profile.html'
-    paginator = Paginator(post_list, posts_limit)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_cursor_page(request, post_list, posts_limit)
+    prefetch_thumbnails(page_obj)
     user = request.user
     following = (
         user.is_authenticated and Follow.objects.filter(
@@ -67,24 +135,59 @@ def profile(request, username):
         'page_obj': page_obj,
         'post_list': post_list,
         'author': author,
+        'author_stats': get_stats(author),
         'following': following
     }
     return render(request, template, context)
 
 
+def get_comments_page(post, after=None):
+    """Страница комментариев поста, от новых к старым."""
+    comments = post.comments.select_related('author').order_by(
+        *CursorPaginator.ordering
+    )
+    paginator = CursorPaginator(comments, comments_limit, after=after)
+    return paginator.get_page()
+
+
+def post_detail_context(post):
+    """Контекст страницы поста, общий для post_detail и add_comment."""
+    prefetch_thumbnails([post])
+    return {
+        'title': post.text[:30],
+        'post': post,
+        'post_list': post.author.author.all(),
+        'author_stats': get_stats(post.author),
+        'form': CommentForm(),
+        'comments': get_comments_page(post),
+    }
+
+
+@query_budget(8)
+@read_only_view
+@condition(etag(post_stamp), last_modified(post_stamp))
 def post_detail(request, post_id):
-    post = Post.objects.get(pk=post_id)
-    username = post.author
-    post_list = Post.objects.select_related(
-        'author').filter(author__username=username)
-    comments = post.comments.select_related(
-        'author')
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     template = 'posts/post_detail.html'
+    context = post_detail_context(post)
+    return render(request, template, context)
+
+
+@query_budget(4)
+def post_comments(request, post_id):
+    """Следующая страница комментариев: HTML-фрагмент или JSON."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = get_comments_page(post, after=request.GET.get('after'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [comment_data(comment) for comment in comments],
+            'next': comments.paginator.next_cursor,
+        })
+    template = 'includes/comments.html'
     context = {
-        'title': post.text[:30],
         'post': post,
-        'post_list': post_list,
-        'form': CommentForm(),
         'comments': comments,
     }
     return render(request, template, context)
@@ -134,9 +237,12 @@ def post_edit(request, post_id):
     return render(request, template, context)
 
 
+@query_budget(12)
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     if request.method == 'POST':
         form = CommentForm(request.POST or None)
         if form.is_valid():
@@ -146,29 +252,18 @@ def add_comment(request, post_id):
             comment.save()
         return redirect('posts:post_detail', post_id=post_id)
     template = 'posts/post_detail.html'
-    post = Post.objects.get(pk=post_id)
-    username = post.author
-    post_list = Post.objects.select_related(
-        'author').filter(author__username=username)
-    comments = post.comments.select_related(
-        'author')
-    context = {
-        'title': post.text[:30],
-        'post': post,
-        'post_list': post_list,
-        'form': CommentForm(),
-        'comments': comments,
-    }
+    context = post_detail_context(post)
     return render(request, template, context)
 
 
+@query_budget(9)
+@read_only_view
 @login_required
+@cache_user_listing(follow_feed_listings)
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
     template = 'posts/follow.html'
-    paginator = Paginator(post_list, posts_limit)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_timeline_page(request, posts_limit)
+    prefetch_thumbnails(page_obj)
     context = {
         'page_obj': page_obj,
     }
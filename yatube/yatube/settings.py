@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,11 +35,81 @@ ALLOWED_HOSTS = [
     '192.168.1.43'
 ]
 
+# manage.py test и pytest пишут в свой каталог: cache.clear() в тестах
+# не должен сбрасывать кэш работающего сайта
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+SHARED_CACHE_DIR = os.path.join(
+    tempfile.gettempdir(), 'yatube-test-cache' if TESTING else 'yatube-cache'
+)
+
+# Двухуровневый кэш: LRU каждого воркера поверх общего файлового кэша.
+# Версии лент читаются только из общего уровня
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+            'SHARED_ONLY_PREFIXES': ['listing_version:', 'listing_changed:'],
+        },
+    },
+    # Общий уровень — файлы на локальном диске одной машины. Страницы
+    # авторизованных кэшируются на каждого читателя, поэтому записей
+    # много: при переполнении удаляется треть файлов, переполнение
+    # проверяется раз в CULL_EVERY записей воркера
+    'shared': {
+        'BACKEND': 'core.cache.SharedFileCache',
+        'LOCATION': SHARED_CACHE_DIR,
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_EVERY': 100},
+    },
+}
+
+# Ленты инвалидируются сигналами, поэтому могут жить в кэше долго
+LISTING_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Сжатие ответов (core.middleware.CompressionMiddleware): с какого размера
+# тела в байтах сжимать и уровни gzip/brotli. Кэшируемые ленты сжимаются
+# один раз, до записи в кэш
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Длина материализованной ленты подписок и порог подписчиков,
+# после которого посты автора не раскладываются по лентам
+TIMELINE_LENGTH = 800
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Миниатюры генерирует воркер `manage.py process_thumbnails`,
+# до этого шаблоны показывают заглушку
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+THUMBNAIL_DEFERRED = True
+
+# Загрузка картинок постов (PostForm): предельный размер файла и число
+# пикселей, до какой стороны уменьшать оригинал и качество JPEG/WebP
+IMAGE_UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+IMAGE_UPLOAD_MAX_PIXELS = 50 * 10 ** 6
+IMAGE_MAX_SIDE = 2048
+IMAGE_QUALITY = 82
+
+# Бюджеты SQL-запросов по маршрутам (дополняют @query_budget во вьюхах).
+# При превышении в DEBUG и тестах запрос падает, в бою пишется warning
+QUERY_BUDGETS = {
+    'about:author': 2,
+    'about:tech': 2,
+    'users:login': 2,
+    'users:signup': 2,
 }
+QUERY_BUDGET_RAISE = DEBUG
+
+# Сколько секунд клиенты и прокси могут не перезапрашивать ответы API
+API_CACHE_MAX_AGE = 30
+
+# Счётчики строк для постраничной админки: сколько секунд хранить COUNT(*)
+# и с какого размера таблицы без фильтров считать приблизительно
+COUNT_CACHE_TIMEOUT = 60
+COUNT_ESTIMATE_THRESHOLD = 100000
 
 #  подключаем движок filebased.EmailBackend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -62,6 +134,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryCountMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -103,9 +179,42 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
     }
 }
 
+# PRAGMA для каждого нового SQLite-соединения (core.signals.tune_sqlite).
+# WAL пускает чтение параллельно с записью, busy_timeout ждёт блокировку
+# вместо «database is locked»; cache_size в КиБ (отрицательное значение)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -int(os.environ.get('YATUBE_SQLITE_CACHE_KB', 20000)),
+    'mmap_size': int(os.environ.get('YATUBE_SQLITE_MMAP', 256 * 1024 * 1024)),
+}
+
+# Реплики для чтения: read_only_view читают со случайной из них. Локально
+# это копии db.sqlite3, которые обновляет `manage.py sync_replicas`;
+# число задаёт переменная окружения YATUBE_DB_REPLICAS
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+
+# Потоки, в которых ASGI-приложение (yatube/asgi.py) выполняет вьюхи:
+# столько запросов одного процесса одновременно работают с базой
+ASGI_THREADS = int(os.environ.get('YATUBE_ASGI_THREADS', 32))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -145,8 +254,17 @@ USE_TZ = True
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+if TESTING:
+    # Загрузки из тестов (в том числе из фикстур mixer) — не в репозиторий
+    MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'yatube-test-media')
 
 STATIC_URL = '/static/'
+# collectstatic собирает сюда файлы с хешем в имени и их .gz/.br копии,
+# отдаёт их core.middleware.StaticFilesMiddleware
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+# Сколько кэшировать статику без хеша в имени (favicon по старому адресу)
+STATIC_MAX_AGE = 60 * 60
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
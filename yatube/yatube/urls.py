@@ -23,6 +23,7 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='index')),
+    path('api/v1/', include('posts.api_urls', namespace='api')),
     path('about/', include('about.urls', namespace='about')),
 ]
 